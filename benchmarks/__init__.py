@@ -0,0 +1 @@
+"""Benchmarks for the Sudoku solver and generator."""
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Memory Benchmark - list-of-lists boards versus the compact Board
+Run from the repository root: python -m benchmarks.bench_memory
+"""
+
+import argparse
+import copy
+import timeit
+import tracemalloc
+
+from sudoku import Sudoku
+
+
+def measure(build, count):
+    """Return the bytes allocated per item by calling build count times."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    items = [build() for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del items
+    return (after - before) / count
+
+
+def _new_game(template):
+    """Copy template's puzzle into a fresh Sudoku, as a live session holds it."""
+    game = Sudoku(template.difficulty)
+    game.solution = template.solution.copy()
+    game.board = template.board.copy()
+    game.original_board = template.original_board.copy()
+    return game
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--games", type=int, default=1000,
+                        help="number of game states to allocate")
+    args = parser.parse_args()
+
+    game = Sudoku("medium")
+    game.create_puzzle()
+    rows = game.board.to_list()
+
+    # The three grids a game holds: solution, board and original_board
+    list_bytes = measure(lambda: [copy.deepcopy(rows) for _ in range(3)],
+                         args.games)
+    board_bytes = measure(lambda: [game.board.copy() for _ in range(3)],
+                          args.games)
+    print(f"{'layout':<14} {'bytes/game':>12} {'copy us':>10}")
+    list_copy = timeit.timeit(lambda: copy.deepcopy(rows), number=2000) / 2000
+    board_copy = timeit.timeit(game.board.copy, number=2000) / 2000
+    print(f"{'list of lists':<14} {list_bytes:>12.0f} {list_copy * 1e6:>10.2f}")
+    print(f"{'Board':<14} {board_bytes:>12.0f} {board_copy * 1e6:>10.2f}")
+
+    game_bytes = measure(lambda: _new_game(game), args.games)
+    print(f"\nWhole Sudoku object (boards + masks): {game_bytes:.0f} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Solver Benchmark - compare the solve strategies on the same puzzles
+Run from the repository root: python -m benchmarks.bench_solvers
+"""
+
+import argparse
+import copy
+import random
+import time
+
+from sudoku import SOLVERS, Sudoku
+
+
+def generate_puzzles(count, difficulty, seed):
+    """Generate count puzzles reproducibly from seed."""
+    random.seed(seed)
+    puzzles = []
+    for _ in range(count):
+        game = Sudoku(difficulty)
+        game.create_puzzle()
+        puzzles.append(game.board)
+    return puzzles
+
+
+def run(puzzles, strategies):
+    """Solve every puzzle with every strategy and print a summary table."""
+    solver = Sudoku()
+    print(f"{'strategy':<10} {'total ms':>10} {'mean ms':>10} {'mean nodes':>12}")
+    for strategy in strategies:
+        elapsed = 0.0
+        nodes = 0
+        for puzzle in puzzles:
+            board = copy.deepcopy(puzzle)
+            start = time.perf_counter()
+            solver.solve(board, strategy)
+            elapsed += time.perf_counter() - start
+            nodes += solver.stats.nodes
+        print(f"{strategy:<10} {elapsed * 1000:>10.1f} "
+              f"{elapsed * 1000 / len(puzzles):>10.2f} "
+              f"{nodes / len(puzzles):>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=50)
+    parser.add_argument("--difficulty", default="hard",
+                        choices=["easy", "medium", "hard"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--strategy", action="append", choices=list(SOLVERS),
+                        help="strategy to time (repeatable, default: all)")
+    args = parser.parse_args()
+
+    puzzles = generate_puzzles(args.count, args.difficulty, args.seed)
+    run(puzzles, args.strategy or list(SOLVERS))
+
+
+if __name__ == "__main__":
+    main()
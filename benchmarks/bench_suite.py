@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite - solver, validity check and generator timings as JSON
+Run from the repository root:
+    python -m benchmarks.bench_suite -o results.json
+    python -m benchmarks.bench_suite --compare results.json
+
+Solve timings use the puzzle corpus in benchmarks/corpus, one file per
+tier. With --compare the run is checked against an earlier results file
+and the exit status is 1 if any metric got worse by more than --threshold.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from sudoku import SOLVERS, Board, Sudoku, board_from_string
+from sudoku_engine import ConstraintState
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+# Corpus tier -> strategies timed on it by default. Plain backtracking
+# needs minutes on the 17-clue and adversarial grids, so it only runs on
+# the easy tier unless asked for with --strategy.
+TIERS = {
+    "easy": ("backtrack", "mrv", "dlx"),
+    "seventeen": ("mrv", "dlx"),
+    "adversarial": ("mrv", "dlx"),
+}
+
+DIFFICULTIES = ("easy", "medium", "hard")
+
+# Metrics where a larger value is an improvement; all others are costs
+HIGHER_IS_BETTER = {"puzzles_per_s"}
+
+
+def load_corpus(tier):
+    """Return the puzzles of a corpus tier as boards."""
+    with open(os.path.join(CORPUS_DIR, tier + ".txt")) as f:
+        return [board_from_string(line) for line in f
+                if line.strip() and not line.startswith("#")]
+
+
+def peak_kib(fn):
+    """Run fn once under tracemalloc and return its peak allocation in KiB."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def bench_solve(puzzles, strategy, repeat):
+    """Time strategy on every puzzle; return its metrics."""
+    solver = Sudoku()
+    times = []
+    nodes = 0
+    for puzzle in puzzles:
+        best = None
+        for _ in range(repeat):
+            board = [row[:] for row in puzzle]
+            start = time.perf_counter()
+            solver.solve(board, strategy)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        times.append(best)
+        nodes += solver.stats.nodes
+
+    def solve_all():
+        for puzzle in puzzles:
+            solver.solve([row[:] for row in puzzle], strategy)
+
+    return {
+        "mean_ms": statistics.mean(times) * 1000,
+        "p50_ms": statistics.median(times) * 1000,
+        "max_ms": max(times) * 1000,
+        "mean_nodes": nodes / len(puzzles),
+        "peak_kib": peak_kib(solve_all),
+    }
+
+
+def bench_is_valid(puzzles, calls):
+    """Time Sudoku.is_valid on random cells of live games."""
+    rng = random.Random(0)
+    games = []
+    for puzzle in puzzles:
+        game = Sudoku()
+        game.board = Board.from_rows(puzzle)
+        game.state = ConstraintState.from_board(game.board)
+        games.append(game)
+    probes = [(rng.choice(games), rng.randrange(9), rng.randrange(9),
+               rng.randint(1, 9)) for _ in range(calls)]
+    start = time.perf_counter()
+    for game, row, col, num in probes:
+        game.is_valid(game.board, row, col, num)
+    elapsed = time.perf_counter() - start
+    return {"ns_per_call": elapsed / calls * 1e9}
+
+
+def bench_generate(difficulty, count, seed):
+    """Time create_puzzle for difficulty; return its metrics."""
+    rng = random.Random(seed)
+    times = []
+    for _ in range(count):
+        game = Sudoku(difficulty, rng=rng)
+        start = time.perf_counter()
+        game.create_puzzle()
+        times.append(time.perf_counter() - start)
+    total = sum(times)
+    return {
+        "puzzles_per_s": count / total if total else 0.0,
+        "mean_ms": statistics.mean(times) * 1000,
+        "max_ms": max(times) * 1000,
+        "peak_kib": peak_kib(
+            lambda: Sudoku(difficulty, rng=random.Random(seed)).create_puzzle()),
+    }
+
+
+def run(args):
+    """Run the selected benchmarks and return the results document."""
+    results = {}
+    for tier in args.tier or list(TIERS):
+        puzzles = load_corpus(tier)
+        for strategy in args.strategy or TIERS[tier]:
+            results[f"solve/{tier}/{strategy}"] = bench_solve(
+                puzzles, strategy, args.repeat)
+    results["is_valid"] = bench_is_valid(load_corpus("easy"), args.calls)
+    for difficulty in DIFFICULTIES:
+        results[f"generate/{difficulty}"] = bench_generate(
+            difficulty, args.count, args.seed)
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """Return (name, metric, old, new) for metrics worse than threshold."""
+    regressions = []
+    for name, metrics in current["results"].items():
+        old_metrics = baseline["results"].get(name)
+        if old_metrics is None:
+            continue
+        for metric, new in metrics.items():
+            old = old_metrics.get(metric)
+            if not old:
+                continue
+            change = (new - old) / old
+            if metric in HIGHER_IS_BETTER:
+                change = -change
+            if change > threshold:
+                regressions.append((name, metric, old, new))
+    return regressions
+
+
+def print_table(document):
+    """Print the results as a table on stderr."""
+    for name, metrics in document["results"].items():
+        values = "  ".join(f"{metric} {value:.2f}"
+                           for metric, value in metrics.items())
+        print(f"{name:<26} {values}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tier", action="append", choices=list(TIERS),
+                        help="corpus tier to solve (repeatable, default: all)")
+    parser.add_argument("--strategy", action="append", choices=list(SOLVERS),
+                        help="strategy to time (repeatable, default: per tier)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="solves per puzzle; the fastest is kept")
+    parser.add_argument("--calls", type=int, default=100000,
+                        help="is_valid calls to time")
+    parser.add_argument("--count", type=int, default=20,
+                        help="puzzles to generate per difficulty")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default="-",
+                        help="write the JSON results here (default: stdout)")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="earlier results file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative change counted as a regression")
+    args = parser.parse_args()
+
+    document = run(args)
+    print_table(document)
+    text = json.dumps(document, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(document, baseline, args.threshold)
+        for name, metric, old, new in regressions:
+            print(f"REGRESSION {name} {metric}: {old:.2f} -> {new:.2f}",
+                  file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
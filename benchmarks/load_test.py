@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Load Test - concurrent players against a running Sudoku web server
+Start a server first (uvicorn sudoku_asgi:app --port 5000, or
+python sudoku_web.py), then run from the repository root:
+
+    python -m benchmarks.load_test --url http://127.0.0.1:5000 --players 50
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+class Client:
+    """Minimal keep-alive HTTP/1.1 client that remembers cookies."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.cookies = {}
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, payload=None):
+        """Send a request and return (status, decoded JSON body)."""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port)
+        body = json.dumps(payload).encode() if payload is not None else b''
+        headers = [f'{method} {path} HTTP/1.1', f'Host: {self.host}',
+                   f'Content-Length: {len(body)}']
+        if payload is not None:
+            headers.append('Content-Type: application/json')
+        if self.cookies:
+            headers.append('Cookie: ' + '; '.join(
+                f'{name}={value}' for name, value in self.cookies.items()))
+        self.writer.write(('\r\n'.join(headers) + '\r\n\r\n').encode() + body)
+        await self.writer.drain()
+
+        version, status = (await self.reader.readline()).split()[:2]
+        status = int(status)
+        keep_alive = version == b'HTTP/1.1'
+        length = 0
+        while True:
+            line = (await self.reader.readline()).decode().strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            name = name.lower()
+            if name == 'content-length':
+                length = int(value)
+            elif name == 'connection':
+                keep_alive = value.strip().lower() != 'close'
+            elif name == 'set-cookie':
+                cookie_name, _, rest = value.strip().partition('=')
+                self.cookies[cookie_name] = rest.split(';')[0]
+        data = await self.reader.readexactly(length)
+        if not keep_alive:
+            self.close()
+        return status, json.loads(data) if data else None
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+async def play(client, difficulty, moves, latencies, errors):
+    """One player: start a game, then make random moves on empty cells."""
+
+    async def timed(method, path, payload=None):
+        start = time.perf_counter()
+        try:
+            status, data = await client.request(method, path, payload)
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            errors.append(path)
+            client.close()
+            return None
+        latencies.setdefault(path.split('?')[0], []).append(
+            time.perf_counter() - start)
+        if status >= 400:
+            errors.append(path)
+        return data
+
+    game = await timed('GET', f'/new_game/{difficulty}')
+    if not game:
+        return
+    original = game['original']
+    empty = [(row, col) for row in range(9) for col in range(9)
+             if original[row][col] == 0]
+    seq = game.get('seq')
+    for _ in range(moves):
+        row, col = random.choice(empty)
+        data = await timed('POST', '/make_move', {
+            'row': row, 'col': col, 'num': random.randint(1, 9), 'seq': seq})
+        if data:
+            seq = data.get('seq')
+    await timed('GET', '/check_solution')
+
+
+async def run(url, players, moves, difficulty):
+    parts = urlsplit(url)
+    latencies = {}
+    errors = []
+    clients = [Client(parts.hostname, parts.port or 80) for _ in range(players)]
+    start = time.perf_counter()
+    await asyncio.gather(*(play(client, difficulty, moves, latencies, errors)
+                           for client in clients))
+    elapsed = time.perf_counter() - start
+    for client in clients:
+        client.close()
+
+    total = sum(len(times) for times in latencies.values())
+    print(f"{players} players, {total} requests in {elapsed:.2f}s: "
+          f"{total / elapsed:.1f} req/s, {len(errors)} errors")
+    print(f"{'route':<18} {'count':>7} {'p50 ms':>9} {'p99 ms':>9}")
+    for route, times in sorted(latencies.items()):
+        times.sort()
+        p99 = times[min(len(times) - 1, int(len(times) * 0.99))]
+        print(f"{route:<18} {len(times):>7} "
+              f"{statistics.median(times) * 1000:>9.2f} {p99 * 1000:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--players", type=int, default=20,
+                        help="concurrent players")
+    parser.add_argument("--moves", type=int, default=50,
+                        help="moves per player")
+    parser.add_argument("--difficulty", default="hard",
+                        choices=["easy", "medium", "hard"])
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.players, args.moves, args.difficulty))
+
+
+if __name__ == "__main__":
+    main()
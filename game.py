@@ -66,10 +66,11 @@ def play_game(difficulty):
             return play_game(difficulty)
         
         elif user_input == "hint":
-            row, col, num = game.get_hint()
-            if row is not None:
-                game.board[row][col] = num
-                print(f"\nHint: Placed {num} at position ({row}, {col})")
+            hint = game.find_hint()
+            if hint is not None:
+                game.make_move(hint.row, hint.col, hint.num)
+                technique = hint.technique.replace("_", " ")
+                print(f"\nHint: Placed {hint.num} at position ({hint.row}, {hint.col}) by {technique}")
                 input("Press Enter to continue...")
             else:
                 print("\nNo more hints available!")
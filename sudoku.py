@@ -1,18 +1,183 @@
+import math
 import random
-import copy
+from array import array
+from sudoku_engine import (BudgetExceeded, ConstraintState, SearchBudget,
+                           SearchStats, backtrack, count_solutions, mrv, peers)
+import sudoku_dlx
+import sudoku_grader
+
+# Search strategies accepted by Sudoku.solve
+SOLVERS = {
+    "backtrack": backtrack,
+    "mrv": mrv,
+    "dlx": sudoku_dlx.dlx,
+}
+
+# Node limit for each search made while generating a puzzle, per board
+# size, and how many fresh starts create_puzzle makes before giving up
+GENERATION_MAX_NODES = {9: 2000, 16: 20000, 25: 200000}
+GENERATION_ATTEMPTS = 20
+
+# Clues an attempt may give back to dig elsewhere when the puzzle is still
+# too easy but no clue can go (see _generate_puzzle)
+GENERATION_SWAPS = 10
+
+# Cells in a row that may fail to be cleared before generation of a board
+# above 9x9 stops digging (see _generate_puzzle)
+MAX_PROOF_MISSES = 8
+
+# Board sizes a game can have: 9x9, 16x16 and 25x25
+SIZES = (9, 16, 25)
+
+# Characters used for empty cells when reading puzzle strings
+EMPTY_CHARS = "0."
+
+# Character of each digit in puzzle strings: 1-9, then letters for the
+# digits of larger boards (lower case is accepted when reading)
+DIGIT_CHARS = "123456789ABCDEFGHIJKLMNOP"
+DIGIT_VALUES = {char: num for num, char in enumerate(DIGIT_CHARS, 1)}
+DIGIT_VALUES.update((char.lower(), num) for char, num in list(DIGIT_VALUES.items()))
+
+
+def board_to_string(board):
+    """Encode a board as a one-line string, '.' for empty cells."""
+    return "".join(DIGIT_CHARS[num - 1] if num else "."
+                   for row in board for num in row)
+
+
+def puzzle_size(text):
+    """Return the board size of a puzzle string from its length.
+    
+    81, 256 and 625 characters are 9x9, 16x16 and 25x25 boards; any other
+    length counts as 9x9 (and fails to decode as such).
+    """
+    length = len(text.strip())
+    size = math.isqrt(length)
+    return size if size in SIZES and size * size == length else 9
+
+
+def board_from_string(text, size=None):
+    """Decode a one-line puzzle string into a list-of-lists board.
+    
+    Without size, the size is taken from the length of the string.
+    """
+    text = text.strip()
+    if size is None:
+        size = puzzle_size(text)
+    if len(text) != size * size:
+        raise ValueError(f"Expected {size * size} characters, got {len(text)}")
+    cells = []
+    for char in text:
+        if char in EMPTY_CHARS:
+            cells.append(0)
+            continue
+        num = DIGIT_VALUES.get(char, 0)
+        if not 0 < num <= size:
+            raise ValueError(f"Invalid character in puzzle: {char!r}")
+        cells.append(num)
+    return [cells[row * size:(row + 1) * size] for row in range(size)]
+
+
+class Board:
+    """A square grid of digits packed one byte per cell.
+    
+    Rows come back as memoryview slices of the same bytearray, so
+    board[row][col] reads and writes cells just like a list of lists.
+    """
+    
+    __slots__ = ("size", "cells")
+    
+    def __init__(self, size=9, cells=None):
+        self.size = size
+        self.cells = bytearray(size * size) if cells is None else bytearray(cells)
+    
+    @classmethod
+    def from_rows(cls, rows):
+        """Build a board from a list of lists."""
+        return cls(len(rows), [num for row in rows for num in row])
+    
+    def __getitem__(self, row):
+        size = self.size
+        if row < 0:
+            row += size
+        return memoryview(self.cells)[row * size:(row + 1) * size]
+    
+    def __len__(self):
+        return self.size
+    
+    def __iter__(self):
+        for row in range(self.size):
+            yield self[row]
+    
+    def __eq__(self, other):
+        if isinstance(other, Board):
+            return self.size == other.size and self.cells == other.cells
+        if isinstance(other, list):
+            return self.to_list() == other
+        return NotImplemented
+    
+    __hash__ = None
+    
+    def __repr__(self):
+        return f"Board({self.size}, {board_to_string(self)!r})"
+    
+    def copy(self):
+        """Return an independent copy of the board."""
+        return Board(self.size, self.cells)
+    
+    def to_list(self):
+        """Return the board as a list of lists, e.g. for JSON output."""
+        size = self.size
+        cells = list(self.cells)
+        return [cells[row * size:(row + 1) * size] for row in range(size)]
+
 
 class Sudoku:
-    def __init__(self, difficulty="medium"):
-        """Initialize a Sudoku game with specified difficulty."""
-        self.size = 9
-        self.box_size = 3
+    __slots__ = ("rng", "size", "box_size", "difficulty", "solution", "board",
+                 "original_board", "state", "pencil", "stats", "empty_count",
+                 "error_count", "conflicts", "seq", "changes", "log_start")
+    
+    # How many recent moves are kept for changes_since
+    CHANGE_LOG_SIZE = 64
+    
+    def __init__(self, difficulty="medium", rng=None, size=9):
+        """Initialize a Sudoku game with specified difficulty.
+        
+        rng is the random.Random used for generation; if None
+        the module-level random functions are used (the module itself is
+        not stored, so games stay picklable). size is one of SIZES.
+        """
+        if size not in SIZES:
+            raise ValueError(f"Board size must be one of {SIZES}")
+        self.rng = rng
+        self.size = size
+        self.box_size = math.isqrt(size)
         self.difficulty = difficulty
-        self.solution = [[0 for _ in range(self.size)] for _ in range(self.size)]
-        self.board = [[0 for _ in range(self.size)] for _ in range(self.size)]
-        self.original_board = [[0 for _ in range(self.size)] for _ in range(self.size)]
+        self.solution = Board(self.size)
+        self.board = Board(self.size)
+        self.original_board = Board(self.size)
+        self.state = ConstraintState(self.size, self.box_size)
+        # Pencil-mark grid for find_hint, built on the first hint and then
+        # kept up to date by make_move; None until then
+        self.pencil = None
+        self.stats = SearchStats()
+        # Running totals kept up to date by make_move and restart
+        self.empty_count = self.size * self.size
+        self.error_count = 0
+        self.conflicts = set()
+        # Move sequence number and a ring buffer of the recent changes:
+        # move seq is stored at seq % CHANGE_LOG_SIZE as cell * 32 + num,
+        # and the log holds every move after log_start
+        self.seq = 0
+        self.changes = array("H", bytes(2 * self.CHANGE_LOG_SIZE))
+        self.log_start = 0
         
     def is_valid(self, board, row, col, num):
         """Check if placing num at (row, col) is valid."""
+        # The live board keeps its masks up to date, so this is a bit test
+        if board is self.board:
+            return self.state.can_place(row, col, num)
+        
         # Check row
         if num in board[row]:
             return False
@@ -30,39 +195,138 @@ class Sudoku:
         
         return True
     
-    def solve(self, board):
-        """Solve the sudoku puzzle using backtracking."""
-        for row in range(self.size):
-            for col in range(self.size):
-                if board[row][col] == 0:
-                    for num in range(1, 10):
-                        if self.is_valid(board, row, col, num):
-                            board[row][col] = num
-                            if self.solve(board):
-                                return True
-                            board[row][col] = 0
-                    return False
-        return True
+    def solve(self, board, strategy="backtrack", cache=None, trace=None,
+              budget=None):
+        """Solve the sudoku puzzle in place.
+        
+        strategy is "backtrack" (row-major, digits in order), "mrv"
+        (fewest candidates first, with single-candidate propagation) or
+        "dlx" (exact cover with Dancing Links). The search counters are left in self.stats
+        (a SearchStats); trace is passed on to it as the per-node callback.
+        With a sudoku_cache.SolutionCache, known puzzles (up to symmetry)
+        are answered from the cache and new solutions are added to it; the
+        cache must be for boards of this game's size.
+        With a SearchBudget, BudgetExceeded is raised (and board left as
+        it was) once the search runs past it.
+        """
+        if strategy not in SOLVERS:
+            raise ValueError(f"Unknown solve strategy: {strategy}")
+        self.stats = SearchStats(trace, budget)
+        if cache is not None:
+            if cache.size != self.size:
+                raise ValueError(f"Cache is for {cache.size}x{cache.size} boards, "
+                                 f"not {self.size}x{self.size}")
+            solution = cache.get(board)
+            if solution is not None:
+                for i, num in enumerate(solution):
+                    board[i // self.size][i % self.size] = num
+                return True
+            puzzle = [list(row) for row in board]
+        state = ConstraintState.from_board(board, self.size, self.box_size)
+        solved = SOLVERS[strategy](board, state, self.stats)
+        if solved and cache is not None:
+            cache.put(puzzle, board)
+        return solved
     
-    def generate_solution(self):
+    def count_solutions(self, board, limit=2, trace=None, budget=None,
+                        strategy="dlx"):
+        """Count the solutions of board, stopping once limit are found.
+        
+        strategy is "dlx" or "mrv"; mrv skips building the exact cover
+        matrix and is faster on boards with few empty cells.
+        """
+        if strategy not in ("dlx", "mrv"):
+            raise ValueError(f"Unknown count strategy: {strategy}")
+        self.stats = SearchStats(trace, budget)
+        if strategy == "mrv":
+            return count_solutions(board, self.size, self.box_size, limit,
+                                   self.stats)
+        return sudoku_dlx.count_solutions(board, self.size, self.box_size,
+                                          limit, self.stats)
+    
+    def generate_solution(self, budget=None):
         """Generate a complete valid sudoku solution."""
-        # Fill diagonal 3x3 boxes first (they don't affect each other)
+        self.solution = Board(self.size)
+        rng = random if self.rng is None else self.rng
+        
+        # Fill diagonal boxes first (they don't affect each other)
         for box in range(0, self.size, self.box_size):
-            nums = list(range(1, 10))
-            random.shuffle(nums)
+            nums = list(range(1, self.size + 1))
+            rng.shuffle(nums)
             idx = 0
             for i in range(box, box + self.box_size):
                 for j in range(box, box + self.box_size):
                     self.solution[i][j] = nums[idx]
                     idx += 1
         
-        # Fill remaining cells
-        self.solve(self.solution)
+        # Fill remaining cells; plain backtracking gets lost on the larger
+        # boards, where dancing links finishes in a few thousand nodes
+        strategy = "backtrack" if self.size == 9 else "dlx"
+        self.solve(self.solution, strategy, budget=budget)
+    
+    def create_puzzle(self, max_nodes=None, token=None,
+                      attempts=GENERATION_ATTEMPTS, time_limit=None):
+        """Create a puzzle by removing numbers from the solution.
+        
+        Easy, medium and hard puzzles are fitted to the sudoku_grader
+        rating of the same name; an attempt that misses it is retried with
+        a new random solution, and if every attempt misses, the finished
+        one whose grade level came closest is kept.
+        
+        Every search is limited to max_nodes (by default the board size's
+        GENERATION_MAX_NODES). An attempt that runs past
+        that starts over as well, so a rare slow fill costs a bounded
+        amount of work; if no attempt finishes, the last BudgetExceeded is
+        raised. Cancelling token (a CancelToken), or running past
+        time_limit seconds in all, stops generation with BudgetExceeded
+        straight away.
+        
+        Afterwards self.stats holds the search counters of the whole
+        generation, summed over every solve and uniqueness check.
+        """
+        if max_nodes is None:
+            max_nodes = GENERATION_MAX_NODES[self.size]
+        # Node limits apply to each search, the time limit to all of them
+        budget = SearchBudget(max_nodes, time_limit=time_limit, token=token)
+        finished = None
+        for attempt in range(attempts):
+            try:
+                grade = self._generate_puzzle(budget)
+            except BudgetExceeded as error:
+                if error.reason in ("cancelled", "time") or (
+                        finished is None and attempt == attempts - 1):
+                    raise
+                continue
+            if grade is None or grade.rating == self.difficulty:
+                return
+            # Keep the attempt whose level is closest to the rating's range
+            low, high = sudoku_grader.RATING_LEVELS[self.difficulty]
+            miss = max(low - grade.level, grade.level - high)
+            if finished is None or miss < finished[0]:
+                finished = (miss, self.solution, self.board,
+                            self.original_board, self.state, self.stats,
+                            self.empty_count)
+        (_, self.solution, self.board, self.original_board, self.state,
+         self.stats, self.empty_count) = finished
+        self.pencil = None
+        self.error_count = 0
+        self.conflicts = set()
     
-    def create_puzzle(self):
-        """Create a puzzle by removing numbers from the solution."""
-        self.generate_solution()
-        self.board = copy.deepcopy(self.solution)
+    def _generate_puzzle(self, budget):
+        """Make one attempt at create_puzzle within budget.
+        
+        When the difficulty is a sudoku_grader rating the puzzle is then
+        fitted to it: while the grader's techniques cannot finish it, a
+        clue they got stuck on is given back, and while it needs nothing
+        as hard as the rating's lowest level, more cells are removed. Once
+        no clue can go, up to GENERATION_SWAPS cleared cells are given back
+        in turn to free the clues in their units.
+        Returns the final Grade, or None for other difficulties.
+        """
+        self.generate_solution(budget)
+        total = self.stats
+        self.board = self.solution.copy()
+        rng = random if self.rng is None else self.rng
         
         # Determine how many cells to remove based on difficulty
         difficulty_levels = {
@@ -70,18 +334,145 @@ class Sudoku:
             "medium": 45,
             "hard": 55
         }
-        cells_to_remove = difficulty_levels.get(self.difficulty, 45)
+        # (given for 9x9, and scaled to the same share of a larger board)
+        cells_to_remove = (difficulty_levels.get(self.difficulty, 45)
+                           * self.size * self.size // 81)
         
-        # Remove numbers randomly
+        # Remove numbers randomly, skipping any removal that would give the
+        # puzzle a second solution
         positions = [(i, j) for i in range(self.size) for j in range(self.size)]
-        random.shuffle(positions)
+        rng.shuffle(positions)
+        positions = iter(positions)
+        
+        state = ConstraintState.from_board(self.board, self.size, self.box_size)
+        target = sudoku_grader.RATING_LEVELS.get(self.difficulty)
+        # Counting solutions is far too slow on the larger boards, so there
+        # a cell is only cleared while the rating's techniques can still
+        # finish the puzzle
+        counted = self.size == 9
+        proof_level = 2 if counted or target is None else target[1]
+        _, unit_rows, unit_cols, unit_boxes, box_of = sudoku_grader.layout(
+            self.size, self.box_size)
+        
+        def forced(row, col, num):
+            """Check if the other clues leave num only one cell to go in."""
+            bit = 1 << (num - 1)
+            if state.candidates(row, col) == bit:
+                return True
+            cell = row * self.size + col
+            cells = self.board.cells
+            for unit in (unit_rows[row], unit_cols[col], unit_boxes[box_of[cell]]):
+                for i in unit:
+                    if (i != cell and not cells[i] and state.candidates(
+                            i // self.size, i % self.size) & bit):
+                        break
+                else:
+                    return True
+            return False
         
-        for i in range(cells_to_remove):
-            row, col = positions[i]
+        def remove(row, col):
+            """Clear (row, col) if the puzzle stays unique; report success."""
+            # The logic proofs do not check the budget themselves
+            budget.check(0)
+            num = self.board[row][col]
             self.board[row][col] = 0
+            state.remove(row, col, num)
+            # A cell the remaining clues already force (a naked or hidden
+            # single) cannot add a solution; otherwise look for a second
+            # solution, stopping as soon as one turns up
+            if forced(row, col, num):
+                return True
+            # Logic that finishes the puzzle proves it has one solution,
+            # and is much cheaper than counting while few cells are empty
+            if sudoku_grader.grade(self.board, self.size, self.box_size,
+                                   max_level=proof_level).solved:
+                return True
+            unique = False
+            if counted:
+                # A check that runs out of nodes just keeps the clue
+                try:
+                    unique = self.count_solutions(
+                        self.board, limit=2, budget=budget,
+                        strategy="mrv") == 1
+                except BudgetExceeded as error:
+                    if error.reason != "nodes":
+                        raise
+                total.add(self.stats)
+            if not unique:
+                self.board[row][col] = num
+                state.place(row, col, num)
+            return unique
+        
+        # Without counting, digging stops once a run of cells in a row
+        # cannot be cleared: the logic has then nearly run out of room, and
+        # every failed proof costs a full grade
+        removed = 0
+        misses = 0
+        for row, col in positions:
+            if remove(row, col):
+                removed += 1
+                misses = 0
+            elif not counted:
+                misses += 1
+            if removed == cells_to_remove or misses == MAX_PROOF_MISSES:
+                break
+        
+        grade = None
+        swaps = 0
+        if target is not None:
+            low, high = target
+            grade = sudoku_grader.grade(self.board, self.size, self.box_size,
+                                        max_level=high)
+            while not grade.solved or grade.level < low:
+                if not grade.solved:
+                    # Too hard: fill in a cell the techniques could not reach
+                    row, col = rng.choice(grade.unsolved)
+                    num = self.solution[row][col]
+                    self.board[row][col] = num
+                    state.place(row, col, num)
+                    removed -= 1
+                else:
+                    # Too easy: take out another clue
+                    row, col = next(positions, (None, None))
+                    if misses == MAX_PROOF_MISSES or (
+                            row is None and swaps == GENERATION_SWAPS):
+                        break
+                    if row is None:
+                        # Every clue left is needed: give back a cleared
+                        # cell and try the clues it sees again, which it
+                        # may now have made free to go
+                        swaps += 1
+                        row, col = rng.choice([
+                            (i, j) for i in range(self.size)
+                            for j in range(self.size) if not self.board[i][j]])
+                        num = self.solution[row][col]
+                        self.board[row][col] = num
+                        state.place(row, col, num)
+                        removed -= 1
+                        clues = [(i, j) for i, j in peers(
+                                     self.size, self.box_size)[
+                                     row * self.size + col]
+                                 if self.board[i][j]]
+                        rng.shuffle(clues)
+                        positions = iter(clues)
+                        continue
+                    if not remove(row, col):
+                        misses += not counted
+                        continue
+                    misses = 0
+                    removed += 1
+                grade = sudoku_grader.grade(self.board, self.size,
+                                            self.box_size, max_level=high)
         
         # Store the original puzzle state
-        self.original_board = copy.deepcopy(self.board)
+        self.original_board = self.board.copy()
+        self.state = state
+        self.pencil = None
+        self.stats = total
+        self.empty_count = removed
+        self.error_count = 0
+        self.conflicts = set()
+        return grade
     
     def is_cell_original(self, row, col):
         """Check if a cell is part of the original puzzle."""
@@ -92,56 +483,206 @@ class Sudoku:
         if self.is_cell_original(row, col):
             return False, "This cell is part of the original puzzle!"
         
-        if num < 0 or num > 9:
-            return False, "Number must be between 0 (to clear) and 9!"
+        if num < 0 or num > self.size:
+            return False, f"Number must be between 0 (to clear) and {self.size}!"
         
+        old = self.board[row][col]
+        if old:
+            self.state.remove(row, col, old)
+        if num:
+            self.state.place(row, col, num)
         self.board[row][col] = num
+        self._log_change(row, col, num)
+        if self.pencil is not None:
+            self.pencil.update(row * self.size + col, num, self.state)
+        
+        # Update the running totals for this one cell
+        target = self.solution[row][col]
+        self.empty_count += (num == 0) - (old == 0)
+        self.error_count += (num not in (0, target)) - (old not in (0, target))
+        
+        # Only this cell and peers holding the old or new digit can change
+        # whether they clash with another cell
+        if num:
+            self._update_conflict(row, col, num)
+        else:
+            self.conflicts.discard((row, col))
+        for r, c in peers(self.size, self.box_size)[row * self.size + col]:
+            value = self.board[r][c]
+            if value and value in (old, num):
+                self._update_conflict(r, c, value)
         return True, "Move successful!"
     
-    def get_hint(self):
-        """Provide a hint by revealing one empty cell."""
-        empty_cells = [(i, j) for i in range(self.size) for j in range(self.size) 
-                       if self.board[i][j] == 0]
+    def _log_change(self, row, col, num):
+        """Bump the sequence number and remember the change."""
+        self.seq += 1
+        self.changes[self.seq % self.CHANGE_LOG_SIZE] = (row * self.size + col) * 32 + num
+        self.log_start = max(self.log_start, self.seq - self.CHANGE_LOG_SIZE)
+    
+    def changes_since(self, seq):
+        """Return [row, col, num] for every cell changed after seq.
         
-        if not empty_cells:
-            return None, None, None
+        Returns None when the change log no longer reaches back to seq (or
+        seq is not an int this game has had), in which case the caller
+        needs the whole board.
+        """
+        if type(seq) is not int or not self.log_start <= seq <= self.seq:
+            return None
+        latest = {}
+        for moved in range(seq + 1, self.seq + 1):
+            cell, num = divmod(self.changes[moved % self.CHANGE_LOG_SIZE], 32)
+            latest[cell] = num
+        return [[*divmod(cell, self.size), num] for cell, num in latest.items()]
+    
+    def _update_conflict(self, row, col, num):
+        """Add or remove (row, col) from the conflict set."""
+        if self.state.clashes(row, col, num):
+            self.conflicts.add((row, col))
+        else:
+            self.conflicts.discard((row, col))
+    
+    def _recount(self):
+        """Recompute the running totals from scratch."""
+        self.empty_count = 0
+        self.error_count = 0
+        self.conflicts = set()
+        for row in range(self.size):
+            for col in range(self.size):
+                num = self.board[row][col]
+                if num == 0:
+                    self.empty_count += 1
+                    continue
+                if num != self.solution[row][col]:
+                    self.error_count += 1
+                if self.state.clashes(row, col, num):
+                    self.conflicts.add((row, col))
+    
+    def restart(self):
+        """Reset the board to the original puzzle."""
+        self.board = self.original_board.copy()
+        self.state = ConstraintState.from_board(self.board, self.size, self.box_size)
+        self.pencil = None
+        self.empty_count = self.board.cells.count(0)
+        self.error_count = 0
+        self.conflicts = set()
+        # Clients cannot catch up on a restart from the log
+        self.seq += 1
+        self.log_start = self.seq
+    
+    def to_bytes(self):
+        """Serialize the game: a small header, then the three grids."""
+        difficulty = self.difficulty.encode()
+        return (bytes([self.size, len(difficulty)]) + difficulty
+                + self.seq.to_bytes(4, "big")
+                + self.solution.cells + self.board.cells
+                + self.original_board.cells)
+    
+    @classmethod
+    def from_bytes(cls, data, rng=None):
+        """Rebuild a game serialized with to_bytes."""
+        size, length = data[0], data[1]
+        game = cls(bytes(data[2:2 + length]).decode(), rng)
+        cells = size * size
+        start = 2 + length
+        game.seq = game.log_start = int.from_bytes(data[start:start + 4], "big")
+        start += 4
+        game.size = size
+        game.box_size = math.isqrt(size)
+        game.solution = Board(size, data[start:start + cells])
+        game.board = Board(size, data[start + cells:start + 2 * cells])
+        game.original_board = Board(size, data[start + 2 * cells:start + 3 * cells])
+        game.state = ConstraintState.from_board(game.board, size, game.box_size)
+        game._recount()
+        return game
+    
+    def find_hint(self):
+        """Return the next hint as a sudoku_grader.Hint, or None if full.
         
-        row, col = random.choice(empty_cells)
-        return row, col, self.solution[row][col]
+        A wrong digit on the board is corrected first (technique
+        "wrong_digit"). Otherwise the hint is the next cell the grader's
+        techniques can fill, found on the pencil-mark grid; if they are
+        stuck, the empty cell with the fewest candidates is revealed from
+        the solution (technique "reveal").
+        """
+        size = self.size
+        solution = self.solution.cells
+        if self.error_count:
+            for i, num in enumerate(self.board.cells):
+                if num and num != solution[i]:
+                    row, col = divmod(i, size)
+                    return sudoku_grader.Hint(row, col, solution[i], "wrong_digit",
+                                              ("wrong_digit",))
+        if not self.empty_count:
+            return None
+        
+        if self.pencil is None:
+            self.pencil = sudoku_grader.CandidateGrid(self.board, size, self.box_size)
+        hint = sudoku_grader.find_hint(self.pencil)
+        if hint is not None:
+            return hint
+        cand = self.pencil.cand
+        i = min((i for i, num in enumerate(self.pencil.cells) if not num),
+                key=lambda i: bin(cand[i]).count("1"))
+        row, col = divmod(i, size)
+        return sudoku_grader.Hint(row, col, solution[i], "reveal", ("reveal",))
+    
+    def get_hint(self):
+        """Provide a hint as (row, col, num); see find_hint."""
+        hint = self.find_hint()
+        if hint is None:
+            return None, None, None
+        return hint.row, hint.col, hint.num
     
     def is_complete(self):
         """Check if the puzzle is completely and correctly solved."""
-        for i in range(self.size):
-            for j in range(self.size):
-                if self.board[i][j] != self.solution[i][j]:
-                    return False
-        return True
+        return self.empty_count == 0 and self.error_count == 0
     
     def display(self):
         """Display the current board state."""
-        print("\n    " + "  ".join([str(i) for i in range(9)]))
-        print("  +" + "-" * 25 + "+")
+        size, box_size = self.size, self.box_size
+        label = len(str(size - 1))
+        margin = " " * (label + 1)
+        print("\n" + margin + "  " + "  ".join([str(i) for i in range(size)]))
+        print(margin + "+" + "-" * (2 * size + 2 * box_size + 1) + "+")
         
-        for i in range(self.size):
-            if i % 3 == 0 and i != 0:
-                print("  |" + "-" * 7 + "+" + "-" * 7 + "+" + "-" * 7 + "|")
+        for i in range(size):
+            if i % box_size == 0 and i != 0:
+                print(margin + "|" + "+".join(["-" * (2 * box_size + 1)] * box_size) + "|")
             
-            row_str = str(i) + " | "
-            for j in range(self.size):
+            row_str = str(i).ljust(label) + " | "
+            for j in range(size):
                 if self.board[i][j] == 0:
                     row_str += ". "
                 else:
                     # Mark original numbers differently (they can't be changed)
                     if self.is_cell_original(i, j):
-                        row_str += str(self.board[i][j]) + " "
+                        row_str += DIGIT_CHARS[self.board[i][j] - 1] + " "
                     else:
-                        row_str += str(self.board[i][j]) + " "
+                        row_str += DIGIT_CHARS[self.board[i][j] - 1] + " "
                 
-                if (j + 1) % 3 == 0 and j != 8:
+                if (j + 1) % box_size == 0 and j != size - 1:
                     row_str += "| "
             
             row_str += "|"
             print(row_str)
         
-        print("  +" + "-" * 25 + "+")
+        print(margin + "+" + "-" * (2 * size + 2 * box_size + 1) + "+")
+
+
+
+def main():
+    """Command-line entry point: python -m sudoku <command>."""
+    import argparse
+    import sudoku_batch
+    
+    parser = argparse.ArgumentParser(prog="python -m sudoku",
+                                     description="Sudoku batch tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    sudoku_batch.add_generate_parser(commands)
+    sudoku_batch.add_solve_parser(commands)
+    args = parser.parse_args()
+    args.run(args)
+
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,402 @@
+"""
+Sudoku API - game request handling shared by the web servers
+The Flask app (sudoku_web.py) and the ASGI app (sudoku_asgi.py) both call
+these functions. Each handler takes the session store, the caller's session
+id and the request data, and returns (status, body) with body ready to be
+encoded as JSON.
+
+The stateless /api/solve and /api/validate routes check puzzles in chunks
+of SOLVE_CHUNK_SIZE on a process pool (solve_chunk) and stream one JSON
+result per line back to the caller.
+"""
+
+import itertools
+import json
+import os
+import secrets
+
+from sudoku import (SIZES, SOLVERS, Sudoku, board_from_string,
+                    board_to_string, puzzle_size)
+from sudoku_cache import open_cache
+from sudoku_engine import BudgetExceeded, ConstraintState, SearchBudget
+from sudoku_metrics import SearchMetrics, render_stats
+from sudoku_pool import PuzzlePool, create_game
+from sudoku_sessions import open_store
+
+DIFFICULTIES = ('easy', 'medium', 'hard')
+
+# Upper limit on the number of moves in one /make_moves request
+MAX_BATCH_MOVES = 1000
+
+# Puzzles handed to a solver process per task by /api/solve and /api/validate
+SOLVE_CHUNK_SIZE = 32
+
+# Solver tasks queued per worker process before results are streamed back
+SOLVE_TASKS_PER_WORKER = 2
+
+# Search budget of one puzzle before it is reported as budget_exceeded:
+# seconds, and nodes visited
+SOLVE_TIME_LIMIT = float(os.environ.get('SUDOKU_SOLVE_TIME_LIMIT', 5))
+SOLVE_MAX_NODES = int(os.environ.get('SUDOKU_SOLVE_MAX_NODES', 1000000))
+
+# Seconds a new game may take to generate when the pool has none ready
+GENERATE_TIME_LIMIT = float(os.environ.get('SUDOKU_GENERATE_TIME_LIMIT', 30))
+
+# Solution cache for /api/solve, off unless set: "memory" for one cache per
+# solver process or "sqlite:<path>" for one they share. Only 9x9 puzzles
+# use it; canonical forms of larger boards cost more than solving them.
+SOLVE_CACHE = os.environ.get('SUDOKU_SOLVE_CACHE')
+
+# Search counters of the puzzles generated and solved by this process
+search_metrics = SearchMetrics()
+
+
+def open_games():
+    """Open the session store configured by the SUDOKU_* environment.
+
+    Set SUDOKU_STORE to "sqlite:<path>" to share games between several
+    worker processes.
+    """
+    return open_store(
+        os.environ.get('SUDOKU_STORE', 'memory'),
+        max_size=int(os.environ.get('SUDOKU_MAX_GAMES', 10000)),
+        ttl=int(os.environ.get('SUDOKU_GAME_TTL', 3600)),
+    )
+
+
+def open_pool(factory=create_game):
+    """Create the puzzle pool configured by the SUDOKU_POOL_* environment.
+
+    factory(difficulty, token) makes each game (see PuzzlePool).
+    """
+    return PuzzlePool(
+        low_watermark=int(os.environ.get('SUDOKU_POOL_LOW', 2)),
+        high_watermark=int(os.environ.get('SUDOKU_POOL_HIGH', 8)),
+        factory=factory,
+    )
+
+
+def load_game(games, session_id):
+    """Return (game, None) for session_id, or (None, (status, body))."""
+    if not session_id:
+        return None, (400, {'error': 'No active game'})
+
+    game = games.get(session_id)
+    if game is None:
+        return None, (410, {
+            'error': 'Game expired, please start a new one',
+            'expired': True
+        })
+    return game, None
+
+
+def conflict_list(game):
+    """Return the game's clashing cells as [row, col] pairs."""
+    return [[row, col] for row, col in sorted(game.conflicts)]
+
+
+def board_update(game, client_seq):
+    """Return what a client at client_seq needs to catch up, plus the new seq.
+
+    While the game's change log reaches back to client_seq only the changed
+    cells are sent; otherwise (or with no seq, or one that is not an int)
+    the whole board is.
+    """
+    changes = game.changes_since(client_seq)
+    if changes is None:
+        return {'seq': game.seq, 'board': game.board.to_list()}
+    return {'seq': game.seq, 'changes': changes}
+
+
+def is_move(game, move):
+    """Check that move is a [row, col, num] list of ints on the board."""
+    return (isinstance(move, list) and len(move) == 3
+            and all(type(value) is int for value in move)
+            and 0 <= move[0] < game.size and 0 <= move[1] < game.size)
+
+
+def new_game_error(difficulty, size):
+    """Return (status, body) if a new game cannot be made as asked, else None."""
+    if difficulty not in DIFFICULTIES:
+        return 400, {'error': 'Invalid difficulty'}
+    if size not in SIZES:
+        return 400, {'error': f'Board size must be one of {", ".join(map(str, SIZES))}'}
+    return None
+
+
+def generation_error(error):
+    """Return (status, body) for a new game whose generation ran out of time."""
+    return 503, {'error': f'Could not generate a puzzle in time ({error}); '
+                          'try again or pick a smaller board'}
+
+
+def start_game(games, game, stats=None):
+    """Store a freshly generated game; return (session_id, (status, body)).
+
+    stats is the generation's SearchStats.as_dict() when the game was made
+    in another process; otherwise game.stats is used.
+    """
+    search_metrics.observe('generate', stats or game.stats.as_dict())
+    session_id = secrets.token_hex(8)
+    games.put(session_id, game)
+
+    # A new game's board is its original puzzle
+    return session_id, (200, {
+        'original': game.original_board.to_list(),
+        'seq': game.seq,
+        'difficulty': game.difficulty,
+        'size': game.size,
+        'session_id': session_id
+    })
+
+
+def make_move(games, session_id, data):
+    """Make a move on the board."""
+    if not isinstance(data, dict):
+        return 400, {'error': 'Request body must be a JSON object'}
+    game, error = load_game(games, session_id)
+    if error:
+        return error
+
+    row = data.get('row')
+    col = data.get('col')
+    num = data.get('num')
+    if not is_move(game, [row, col, num]):
+        return 400, {'error': 'Invalid move'}
+
+    success, message = game.make_move(row, col, num)
+    if success:
+        games.put(session_id, game)
+
+    return 200, {
+        'success': success,
+        'message': message,
+        **board_update(game, data.get('seq')),
+        'conflicts': conflict_list(game),
+        'complete': game.is_complete()
+    }
+
+
+def make_moves(games, session_id, data):
+    """Apply a list of [row, col, num] moves in one request."""
+    if not isinstance(data, dict):
+        return 400, {'error': 'Request body must be a JSON object'}
+    game, error = load_game(games, session_id)
+    if error:
+        return error
+
+    moves = data.get('moves')
+    if not isinstance(moves, list) or len(moves) > MAX_BATCH_MOVES:
+        return 400, {
+            'error': f'moves must be a list of at most {MAX_BATCH_MOVES} [row, col, num] entries'
+        }
+
+    results = []
+    changed = False
+    for move in moves:
+        if not is_move(game, move):
+            results.append({'success': False, 'message': 'Invalid move!'})
+            continue
+        success, message = game.make_move(*move)
+        changed = changed or success
+        results.append({'success': success, 'message': message})
+    if changed:
+        games.put(session_id, game)
+
+    return 200, {
+        'results': results,
+        **board_update(game, data.get('seq')),
+        'conflicts': conflict_list(game),
+        'complete': game.is_complete()
+    }
+
+
+def get_hint(games, session_id, client_seq=None):
+    """Get a hint for the current game and apply it."""
+    game, error = load_game(games, session_id)
+    if error:
+        return error
+
+    hint = game.find_hint()
+
+    if hint is None:
+        return 200, {'error': 'No hints available'}
+
+    # Apply the hint
+    game.make_move(hint.row, hint.col, hint.num)
+    games.put(session_id, game)
+
+    return 200, {
+        'row': hint.row,
+        'col': hint.col,
+        'num': hint.num,
+        'technique': hint.technique,
+        **board_update(game, client_seq),
+        'complete': game.is_complete()
+    }
+
+
+def check_solution(games, session_id):
+    """Check if the current solution is correct."""
+    game, error = load_game(games, session_id)
+    if error:
+        return error
+
+    if game.is_complete():
+        return 200, {
+            'complete': True,
+            'errors': 0,
+            'message': 'Congratulations! You solved it!'
+        }
+
+    errors = game.error_count
+    empty = game.empty_count
+
+    return 200, {
+        'complete': False,
+        'errors': errors,
+        'empty': empty,
+        'conflicts': conflict_list(game),
+        'message': f'{errors} error(s), {empty} cell(s) remaining'
+    }
+
+
+def restart(games, session_id):
+    """Restart the current game."""
+    game, error = load_game(games, session_id)
+    if error:
+        return error
+    game.restart()
+    games.put(session_id, game)
+
+    # The client already has the original puzzle, so no board is sent
+    return 200, {
+        'seq': game.seq,
+        'restart': True,
+        'message': 'Game restarted'
+    }
+
+
+def read_puzzles(data):
+    """Return the puzzle list from a JSON body, or None if there is none.
+
+    The body is either {"puzzle": "<81 chars>"} or {"puzzles": [...]};
+    16x16 and 25x25 puzzles are 256 and 625 characters long.
+    """
+    if not isinstance(data, dict):
+        return None
+    if isinstance(data.get('puzzles'), list):
+        return data['puzzles']
+    if 'puzzle' in data:
+        return [data['puzzle']]
+    return None
+
+
+def read_puzzle_lines(lines):
+    """Yield the puzzles of a text body, one per non-blank line."""
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', 'replace')
+        line = line.strip()
+        if line:
+            yield line
+
+
+def check_puzzle(game, text, validate, strategy, budget=None, cache=None):
+    """Solve or validate one puzzle string and return its result.
+
+    Solutions are looked up in and added to cache, a SolutionCache for
+    the game's board size, if given. Raises BudgetExceeded if the search
+    runs past budget.
+    """
+    if not isinstance(text, str):
+        return {'status': 'invalid', 'error': 'Puzzles must be strings'}
+    try:
+        board = board_from_string(text, game.size)
+    except ValueError as error:
+        return {'status': 'invalid', 'error': str(error)}
+    state = ConstraintState.from_board(board, game.size, game.box_size)
+    if any(count > 1 for count in state.counts):
+        return {'status': 'invalid', 'error': 'Puzzle has clashing givens'}
+
+    if validate:
+        solutions = game.count_solutions(board, limit=2, budget=budget)
+        return {'status': ('no_solution', 'valid',
+                           'multiple_solutions')[solutions],
+                'stats': game.stats.as_dict()}
+    if not game.solve(board, strategy, cache=cache, budget=budget):
+        return {'status': 'no_solution', 'stats': game.stats.as_dict()}
+    return {'status': 'solved', 'solution': board_to_string(board),
+            'stats': game.stats.as_dict()}
+
+
+def solve_chunk(start, puzzles, validate, strategy, time_limit, max_nodes):
+    """Check a run of puzzles in a solver process; return their results.
+
+    Each puzzle gets its own SearchBudget of time_limit seconds and
+    max_nodes nodes, and its index in the whole request. The board size of
+    each puzzle follows from its length. 9x9 solutions go through the
+    SUDOKU_SOLVE_CACHE cache when one is configured.
+    """
+    solvers = {size: Sudoku(size=size) for size in SIZES}
+    cache = open_cache(SOLVE_CACHE) if SOLVE_CACHE else None
+    results = []
+    for index, text in enumerate(puzzles, start):
+        game = solvers[puzzle_size(text) if isinstance(text, str) else 9]
+        budget = SearchBudget(max_nodes, time_limit)
+        try:
+            result = check_puzzle(game, text, validate, strategy, budget,
+                                  cache if game.size == 9 else None)
+        except BudgetExceeded as error:
+            result = {'status': 'budget_exceeded', 'error': str(error),
+                      'stats': game.stats.as_dict()}
+        results.append({'index': index, **result})
+    return results
+
+
+def solve_tasks(puzzles, validate, strategy, time_limit=SOLVE_TIME_LIMIT,
+                max_nodes=SOLVE_MAX_NODES, start=0):
+    """Split an iterable of puzzles into solve_chunk argument tuples.
+
+    The input is consumed lazily, one chunk at a time. start is the index
+    in the whole request of the first puzzle.
+    """
+    puzzles = iter(puzzles)
+    for start in itertools.count(start, SOLVE_CHUNK_SIZE):
+        chunk = list(itertools.islice(puzzles, SOLVE_CHUNK_SIZE))
+        if not chunk:
+            return
+        yield start, chunk, validate, strategy, time_limit, max_nodes
+
+
+def solve_request_error(puzzles, strategy):
+    """Return (status, body) if a solve/validate request is unusable, else None."""
+    if puzzles is None:
+        return 400, {
+            'error': 'Send {"puzzle": ...}, {"puzzles": [...]} or one puzzle per line'
+        }
+    if strategy not in SOLVERS:
+        return 400, {'error': f'Unknown solve strategy: {strategy}'}
+    return None
+
+
+def ndjson_lines(results, kind):
+    """Encode each list of results from solve_chunk as NDJSON bytes.
+
+    The search counters of each result are added to search_metrics under
+    kind on the way through.
+    """
+    for chunk in results:
+        for result in chunk:
+            if 'stats' in result:
+                search_metrics.observe(kind, result['stats'])
+        yield b''.join(json.dumps(result, separators=(',', ':')).encode()
+                       + b'\n' for result in chunk)
+
+
+def metrics_text(games, pool):
+    """Return the Prometheus metrics page for a server's store and pool."""
+    lines = search_metrics.render()
+    lines += render_stats('sudoku_sessions', games.stats(), 'Session store')
+    lines += render_stats('sudoku_pool', pool.stats(), 'Puzzle pool')
+    return '\n'.join(lines) + '\n'
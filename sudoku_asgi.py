@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+Sudoku Game - ASGI server
+Serves the same game routes as sudoku_web.py from an asyncio event loop.
+Puzzle generation that misses the pool runs in a process pool, so one slow
+puzzle does not hold up other players.
+
+The page also opens a WebSocket on /ws and sends moves, hints, checks and
+restarts over it as small JSON messages, falling back to the HTTP routes
+when the socket is unavailable (for example under sudoku_web.py).
+
+Run with: uvicorn sudoku_asgi:app --port 5000
+"""
+
+import asyncio
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs
+
+import sudoku_api
+from sudoku import Sudoku
+from sudoku_engine import BudgetExceeded
+from sudoku_pool import create_game_bytes
+
+COOKIE_NAME = 'sudoku_game'
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             'templates', 'sudoku.html')
+
+# Store games in session, dropping old or idle ones
+games = sudoku_api.open_games()
+
+# Created on first use; SUDOKU_GENERATORS sets the number of processes
+workers = int(os.environ.get('SUDOKU_GENERATORS', 0)) or os.cpu_count() or 1
+_executor = None
+
+
+def executor():
+    """Return the process pool used for CPU-bound work."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=workers)
+    return _executor
+
+
+def create_pool_game(difficulty, token=None):
+    """Generate a game for the puzzle pool in the process pool.
+
+    The pool's refill thread only waits here, so generation does not hold
+    the GIL the event loop needs. A game that finishes after token is
+    cancelled is dropped.
+    """
+    data, stats = executor().submit(create_game_bytes, difficulty).result()
+    if token is not None and token.cancelled:
+        raise BudgetExceeded("cancelled", "Search cancelled")
+    game = Sudoku.from_bytes(data)
+    # Keep the generation counters for the metrics start_game records
+    for name, value in stats.items():
+        setattr(game.stats, name, value)
+    return game
+
+
+# Puzzles generated ahead of time so new_game rarely has to wait
+puzzle_pool = sudoku_api.open_pool(create_pool_game)
+
+
+async def ordered_map(fn, items, max_in_flight):
+    """Async version of sudoku_batch.ordered_map over the process pool.
+
+    items is an async iterable, so it can come from the request body.
+    """
+    loop = asyncio.get_running_loop()
+    pending = deque()
+    try:
+        async for item in items:
+            if len(pending) >= max_in_flight:
+                yield await pending.popleft()
+            pending.append(loop.run_in_executor(executor(), fn, *item))
+        while pending:
+            yield await pending.popleft()
+    finally:
+        # The client went away: drop the work that has not started yet
+        for future in pending:
+            future.cancel()
+
+
+async def run_cpu(fn, *args):
+    """Run fn(*args) in the process pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor(), fn, *args)
+
+
+def session_from_scope(scope):
+    """Return the game session id from the request cookies, or None."""
+    for name, value in scope['headers']:
+        if name.lower() == b'cookie':
+            morsel = SimpleCookie(value.decode()).get(COOKIE_NAME)
+            if morsel:
+                return morsel.value
+    return None
+
+
+class Request:
+    """The parts of an HTTP request the routes need."""
+
+    def __init__(self, scope, body, receive=None):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.query = parse_qs(scope.get('query_string', b'').decode())
+        self.headers = {name.decode().lower(): value.decode()
+                        for name, value in scope['headers']}
+        # The body, or None for a STREAMED_ROUTES route, which reads it
+        # from receive itself
+        self.body = body
+        self.receive = receive
+        self.session_id = session_from_scope(scope)
+
+    def json(self):
+        """Decode the body as a JSON object ({} if missing or invalid)."""
+        try:
+            data = json.loads(self.body or b'{}')
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def arg(self, name, type=str):
+        """Return a query-string argument converted with type, or None."""
+        values = self.query.get(name)
+        if not values:
+            return None
+        try:
+            return type(values[0])
+        except ValueError:
+            return None
+
+
+class Response:
+    def __init__(self, body, status=200, content_type='application/json',
+                 headers=()):
+        self.body = body
+        self.status = status
+        self.headers = [(b'content-type', content_type.encode()),
+                        (b'content-length', str(len(body)).encode())]
+        self.headers.extend(headers)
+
+
+class StreamingResponse:
+    """A response whose body is sent as it is produced by an async iterator."""
+
+    def __init__(self, chunks, status=200, content_type='application/json'):
+        self.chunks = chunks
+        self.status = status
+        self.headers = [(b'content-type', content_type.encode())]
+
+
+def json_response(result, headers=()):
+    """Encode a (status, body) pair from sudoku_api."""
+    status, body = result
+    return Response(json.dumps(body, separators=(',', ':')).encode(), status,
+                    headers=headers)
+
+
+async def index(request):
+    """Main page - serve the game interface."""
+    with open(TEMPLATE_PATH, 'rb') as f:
+        return Response(f.read(), content_type='text/html; charset=utf-8')
+
+
+async def new_game(request, difficulty):
+    """Start a new game with specified difficulty (and ?size=, default 9)."""
+    size = request.arg('size', int) or 9
+    error = sudoku_api.new_game_error(difficulty, size)
+    if error:
+        return json_response(error)
+
+    # The pool only holds 9x9 games
+    game = puzzle_pool.take(difficulty) if size == 9 else None
+    stats = None
+    if game is None:
+        try:
+            data, stats = await run_cpu(create_game_bytes, difficulty, size,
+                                        sudoku_api.GENERATE_TIME_LIMIT)
+        except BudgetExceeded as error:
+            return json_response(sudoku_api.generation_error(error))
+        game = Sudoku.from_bytes(data)
+
+    session_id, result = sudoku_api.start_game(games, game, stats)
+    cookie = f'{COOKIE_NAME}={session_id}; Path=/; HttpOnly; SameSite=Lax'
+    return json_response(result, [(b'set-cookie', cookie.encode())])
+
+
+async def make_move(request):
+    """Make a move on the board."""
+    return json_response(sudoku_api.make_move(games, request.session_id,
+                                              request.json()))
+
+
+async def make_moves(request):
+    """Apply a list of [row, col, num] moves in one request."""
+    return json_response(sudoku_api.make_moves(games, request.session_id,
+                                               request.json()))
+
+
+async def get_hint(request):
+    """Get a hint for the current game."""
+    return json_response(sudoku_api.get_hint(games, request.session_id,
+                                             request.arg('seq', int)))
+
+
+async def check_solution(request):
+    """Check if the current solution is correct."""
+    return json_response(sudoku_api.check_solution(games, request.session_id))
+
+
+async def restart(request):
+    """Restart the current game."""
+    return json_response(sudoku_api.restart(games, request.session_id))
+
+
+async def body_lines(receive):
+    """Yield the lines of the request body as its chunks arrive."""
+    rest = b''
+    while True:
+        message = await receive()
+        lines = (rest + message.get('body', b'')).split(b'\n')
+        rest = lines.pop()
+        for line in lines:
+            yield line
+        if not message.get('more_body'):
+            if rest:
+                yield rest
+            return
+
+
+async def solve_tasks(puzzles, validate, strategy):
+    """Async sudoku_api.solve_tasks over an async iterable of puzzles."""
+    chunk = []
+    start = 0
+    async for puzzle in puzzles:
+        chunk.append(puzzle)
+        if len(chunk) == sudoku_api.SOLVE_CHUNK_SIZE:
+            for task in sudoku_api.solve_tasks(chunk, validate, strategy,
+                                               start=start):
+                yield task
+            start += len(chunk)
+            chunk = []
+    for task in sudoku_api.solve_tasks(chunk, validate, strategy,
+                                       start=start):
+        yield task
+
+
+async def json_puzzles(puzzles):
+    """Yield the puzzles of a JSON body one at a time."""
+    for puzzle in puzzles:
+        yield puzzle
+
+
+async def text_puzzles(receive):
+    """Yield the puzzles of a text body, one per non-blank line.
+
+    Only the lines of the chunk being read are held, so memory stays flat
+    however many puzzles are sent.
+    """
+    async for line in body_lines(receive):
+        for puzzle in sudoku_api.read_puzzle_lines([line]):
+            yield puzzle
+
+
+async def solve_puzzles(request, validate):
+    """Stream NDJSON results for the puzzles in the request body.
+
+    A JSON body holds "puzzle" or "puzzles"; any other body is read as one
+    puzzle per line, a chunk at a time, while results stream back.
+    """
+    if request.headers.get('content-type', '').startswith('application/json'):
+        request.body = await read_body(request.receive)
+        puzzles = sudoku_api.read_puzzles(request.json())
+        if puzzles is not None:
+            puzzles = json_puzzles(puzzles)
+    else:
+        puzzles = text_puzzles(request.receive)
+    strategy = request.arg('strategy') or 'mrv'
+    error = sudoku_api.solve_request_error(puzzles, strategy)
+    if error:
+        return json_response(error)
+
+    tasks = solve_tasks(puzzles, validate, strategy)
+    in_flight = sudoku_api.SOLVE_TASKS_PER_WORKER * workers
+
+    async def chunks():
+        async for results in ordered_map(sudoku_api.solve_chunk, tasks,
+                                         in_flight):
+            for line in sudoku_api.ndjson_lines(
+                    [results], 'validate' if validate else 'solve'):
+                yield line
+
+    return StreamingResponse(chunks(), content_type='application/x-ndjson')
+
+
+async def api_solve(request):
+    """Solve one or many puzzles, streaming a result line per puzzle."""
+    return await solve_puzzles(request, validate=False)
+
+
+async def api_validate(request):
+    """Check one or many puzzles for clashes and a unique solution."""
+    return await solve_puzzles(request, validate=True)
+
+
+async def metrics(request):
+    """Search, session and pool metrics in the Prometheus text format."""
+    text = sudoku_api.metrics_text(games, puzzle_pool)
+    return Response(text.encode(),
+                    content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# Routes that read the request body themselves, as it arrives
+STREAMED_ROUTES = {('POST', '/api/solve'), ('POST', '/api/validate')}
+
+# (method, path) -> handler; /new_game/<difficulty> is matched separately
+ROUTES = {
+    ('GET', '/'): index,
+    ('POST', '/make_move'): make_move,
+    ('POST', '/make_moves'): make_moves,
+    ('GET', '/get_hint'): get_hint,
+    ('GET', '/check_solution'): check_solution,
+    ('GET', '/restart'): restart,
+    ('POST', '/api/solve'): api_solve,
+    ('POST', '/api/validate'): api_validate,
+    ('GET', '/metrics'): metrics,
+}
+
+
+async def dispatch(request):
+    """Route a request to its handler."""
+    handler = ROUTES.get((request.method, request.path))
+    if handler is not None:
+        return await handler(request)
+    if request.method == 'GET' and request.path.startswith('/new_game/'):
+        return await new_game(request, request.path[len('/new_game/'):])
+    return json_response((404, {'error': 'Not found'}))
+
+
+# WebSocket message type -> handler(session_id, message) in sudoku_api terms
+SOCKET_HANDLERS = {
+    'move': lambda session_id, message: sudoku_api.make_move(
+        games, session_id, message),
+    'moves': lambda session_id, message: sudoku_api.make_moves(
+        games, session_id, message),
+    'hint': lambda session_id, message: sudoku_api.get_hint(
+        games, session_id, message.get('seq')),
+    'check': lambda session_id, message: sudoku_api.check_solution(
+        games, session_id),
+    'restart': lambda session_id, message: sudoku_api.restart(
+        games, session_id),
+}
+
+
+def handle_socket_message(session_id, text):
+    """Answer one WebSocket message with the matching API handler.
+
+    The reply echoes the message's type and id and carries the same fields
+    as the HTTP route, plus the HTTP status.
+    """
+    try:
+        message = json.loads(text)
+    except ValueError:
+        message = None
+    if not isinstance(message, dict):
+        return {'status': 400, 'error': 'Messages must be JSON objects'}
+
+    handler = SOCKET_HANDLERS.get(message.get('type'))
+    if handler is None:
+        status, body = 400, {'error': 'Unknown message type'}
+    else:
+        status, body = handler(session_id, message)
+    return {'type': message.get('type'), 'id': message.get('id'),
+            'status': status, **body}
+
+
+async def websocket(scope, receive, send):
+    """Serve the /ws live-play channel for the game in the session cookie."""
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+    if scope['path'] != '/ws':
+        await send({'type': 'websocket.close', 'code': 1008})
+        return
+
+    session_id = session_from_scope(scope)
+    await send({'type': 'websocket.accept'})
+    while True:
+        message = await receive()
+        if message['type'] == 'websocket.disconnect':
+            return
+        text = message.get('text')
+        if text is None:
+            text = (message.get('bytes') or b'').decode()
+        reply = handle_socket_message(session_id, text)
+        await send({'type': 'websocket.send',
+                    'text': json.dumps(reply, separators=(',', ':'))})
+
+
+async def read_body(receive):
+    """Collect the full request body."""
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+async def lifespan(receive, send):
+    """Start the puzzle pool on startup and shut the workers down on exit."""
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            puzzle_pool.start()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            puzzle_pool.stop()
+            if _executor is not None:
+                _executor.shutdown()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI entry point."""
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] == 'websocket':
+        await websocket(scope, receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    if (scope['method'], scope['path']) in STREAMED_ROUTES:
+        request = Request(scope, None, receive)
+    else:
+        request = Request(scope, await read_body(receive))
+    response = await dispatch(request)
+    await send({
+        'type': 'http.response.start',
+        'status': response.status,
+        'headers': response.headers,
+    })
+    if isinstance(response, StreamingResponse):
+        async for chunk in response.chunks:
+            await send({'type': 'http.response.body', 'body': chunk,
+                        'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+    await send({'type': 'http.response.body', 'body': response.body})
+
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run('sudoku_asgi:app', host='0.0.0.0', port=5000)
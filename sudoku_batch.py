@@ -0,0 +1,285 @@
+"""
+Sudoku Batch - offline puzzle generation and solving across a process pool
+Usage: python -m sudoku generate --count 100000 --difficulty hard --workers 8
+       python -m sudoku solve puzzles.txt -o solutions.txt
+       python -m sudoku generate --size 16 --count 100
+"""
+
+import mmap
+import os
+import random
+import sys
+import time
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from sudoku import DIGIT_VALUES, SIZES, SOLVERS, Sudoku, board_to_string
+from sudoku_cache import open_cache
+from sudoku_engine import BudgetExceeded, ConstraintState, SearchBudget
+
+
+def ordered_map(executor, fn, items, max_in_flight):
+    """Like executor.map, but with at most max_in_flight pending tasks.
+
+    items is consumed lazily and results are yielded in input order, so
+    memory stays bounded however long the input is.
+    """
+    pending = deque()
+    try:
+        for item in items:
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+            pending.append(executor.submit(fn, *item))
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        # Closed early (a web client went away): drop the work that has
+        # not started yet
+        for future in pending:
+            future.cancel()
+
+
+def generate_chunk(difficulty, seed, chunk, count, with_solutions, size=9):
+    """Generate count puzzles for one chunk and return them as text lines.
+
+    Each chunk has its own RNG seeded from (seed, chunk), so the output is
+    the same whatever the number of workers.
+    """
+    rng = random.Random(f"{seed}:{chunk}")
+    lines = []
+    for _ in range(count):
+        game = Sudoku(difficulty, rng=rng, size=size)
+        game.create_puzzle()
+        line = board_to_string(game.board)
+        if with_solutions:
+            line += "," + board_to_string(game.solution)
+        lines.append(line + "\n")
+    return lines
+
+
+def generate(out, count, difficulty, workers, seed, chunk_size=100,
+             with_solutions=False, size=9):
+    """Write count puzzles to the file object out, in chunk order."""
+    chunks = ((difficulty, seed, chunk, min(chunk_size, count - start),
+               with_solutions, size)
+              for chunk, start in enumerate(range(0, count, chunk_size)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for lines in ordered_map(executor, generate_chunk, chunks,
+                                 max_in_flight=2 * workers):
+            out.writelines(lines)
+
+
+def run_generate(args):
+    """Handle the generate command."""
+    workers = args.workers or os.cpu_count() or 1
+    out = open(args.output, "w") if args.output != "-" else sys.stdout
+    start = time.perf_counter()
+    try:
+        generate(out, args.count, args.difficulty, workers, args.seed,
+                 args.chunk_size, args.solutions, args.size)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+    rate = args.count / elapsed if elapsed else 0.0
+    print(f"Generated {args.count} {args.difficulty} {args.size}x{args.size} "
+          f"puzzles in {elapsed:.2f}s ({rate:.1f} puzzles/s, {workers} workers)",
+          file=sys.stderr)
+
+
+# Byte value -> digit for puzzle files; anything else marks a bad puzzle
+DIGITS = {ord(char): 0 for char in "0."}
+DIGITS.update((ord(char), num) for char, num in DIGIT_VALUES.items())
+
+# Open maps of puzzle files, kept for the life of a worker process
+_mapped = {}
+
+
+def map_file(path):
+    """Return a read-only mmap of path, reusing it within this process."""
+    mapped = _mapped.get(path)
+    if mapped is None:
+        with open(path, "rb") as f:
+            mapped = _mapped[path] = mmap.mmap(f.fileno(), 0,
+                                               access=mmap.ACCESS_READ)
+    return mapped
+
+
+def split_file(path, chunk_bytes):
+    """Yield (start, end) byte ranges of about chunk_bytes, on line breaks."""
+    if os.path.getsize(path) == 0:
+        return
+    mapped = map_file(path)
+    start = 0
+    while start < len(mapped):
+        end = mapped.find(b"\n", start + chunk_bytes)
+        end = len(mapped) if end < 0 else end + 1
+        yield start, end
+        start = end
+
+
+def parse_puzzle(line, size=9):
+    """Decode the first size*size bytes of a line into a board, or None."""
+    cells = size * size
+    if len(line) < cells:
+        return None
+    board = []
+    for row in range(size):
+        values = []
+        for byte in line[row * size:(row + 1) * size]:
+            num = DIGITS.get(byte)
+            if num is None or num > size:
+                return None
+            values.append(num)
+        board.append(values)
+    return board
+
+
+def solve_range(path, start, end, strategy, max_nodes=None, time_limit=None,
+                size=9, cache=None):
+    """Solve the puzzles in bytes [start, end) of path.
+
+    cache is a sudoku_cache.open_cache spec; puzzles already solved up to
+    symmetry are then answered from that cache.
+
+    Returns the output lines as one bytes object, the solve time of every
+    puzzle in seconds, the number of puzzles left unsolved and how many
+    of those ran past their budget of max_nodes nodes or time_limit
+    seconds. Lines are read straight from the mapped file; blank lines
+    and lines starting with '#' are copied to the output as they are, so
+    output line N always belongs to input line N.
+    """
+    view = memoryview(map_file(path))
+    game = Sudoku(size=size)
+    if cache is not None:
+        cache = open_cache(cache, size, game.box_size)
+    out = []
+    times = array("d")
+    unsolved = over_budget = 0
+    pos = start
+    while pos < end:
+        stop = view.obj.find(b"\n", pos, end)
+        if stop < 0:
+            stop = end
+        line = view[pos:stop]
+        pos = stop + 1
+        if not line or line[0] in b"#\r":
+            out.append(bytes(line).rstrip(b"\r").decode(errors="replace"))
+            continue
+
+        began = time.perf_counter()
+        board = parse_puzzle(line, size)
+        solved = False
+        if board is not None:
+            state = ConstraintState.from_board(board, size, game.box_size)
+            if not any(count > 1 for count in state.counts):
+                try:
+                    solved = game.solve(board, strategy, cache=cache,
+                                        budget=SearchBudget(max_nodes, time_limit))
+                except BudgetExceeded:
+                    over_budget += 1
+        times.append(time.perf_counter() - began)
+        out.append(board_to_string(board) if solved else "-")
+        unsolved += not solved
+    view.release()
+    return (("\n".join(out) + "\n" if out else "").encode(), times, unsolved,
+            over_budget)
+
+
+def percentile(values, fraction):
+    """Return the value at fraction (0..1) of the sorted list values."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def run_solve(args):
+    """Handle the solve command."""
+    workers = args.workers or os.cpu_count() or 1
+    out = open(args.output, "wb") if args.output != "-" else sys.stdout.buffer
+    path = os.path.abspath(args.input)
+    cache = None
+    if args.cache is not None:
+        if args.size != 9:
+            # Canonical forms of larger boards cost more than solving them
+            sys.exit("--cache only supports 9x9 puzzles")
+        cache = "sqlite:" + os.path.abspath(args.cache) if args.cache else "memory"
+    tasks = ((path, start, end, args.strategy, args.max_nodes, args.time_limit,
+              args.size, cache)
+             for start, end in split_file(path, args.chunk_size
+                                          * (args.size * args.size + 1)))
+    times = array("d")
+    unsolved = 0
+    over_budget = 0
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for lines, chunk_times, chunk_unsolved, chunk_over in ordered_map(
+                    executor, solve_range, tasks, max_in_flight=2 * workers):
+                out.write(lines)
+                times.extend(chunk_times)
+                unsolved += chunk_unsolved
+                over_budget += chunk_over
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+    elapsed = time.perf_counter() - start
+    count = len(times)
+    rate = count / elapsed if elapsed else 0.0
+    times = sorted(times)
+    print(f"Solved {count - unsolved} of {count} puzzles ({over_budget} over "
+          f"budget) in {elapsed:.2f}s "
+          f"({rate:.1f} puzzles/s, {workers} workers); solve time "
+          f"p50 {percentile(times, 0.5) * 1000:.3f}ms, "
+          f"p99 {percentile(times, 0.99) * 1000:.3f}ms", file=sys.stderr)
+
+
+def add_solve_parser(commands):
+    """Register the solve command on an argparse subparsers object."""
+    parser = commands.add_parser(
+        "solve", help="solve a file of puzzles, one 81-character puzzle per line")
+    parser.add_argument("input", help="puzzle file ('0' or '.' for empty cells)")
+    parser.add_argument("--size", type=int, default=9, choices=SIZES,
+                        help="board size; puzzles have size*size characters, "
+                             "with A-P for the digits above 9")
+    parser.add_argument("--strategy", default="mrv", choices=sorted(SOLVERS))
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=1000,
+                        help="approximate puzzles per task handed to a worker")
+    parser.add_argument("--max-nodes", type=int, default=None,
+                        help="give up on a puzzle after this many search nodes")
+    parser.add_argument("--time-limit", type=float, default=None,
+                        help="give up on a puzzle after this many seconds")
+    parser.add_argument("--cache", nargs="?", const="", metavar="PATH",
+                        help="answer 9x9 puzzles that repeat up to symmetry "
+                             "from a solution cache, per worker or shared in "
+                             "the sqlite file PATH")
+    parser.add_argument("-o", "--output", default="-",
+                        help="output file, one solution per line in input "
+                             "order, '-' for unsolvable, invalid or "
+                             "over-budget puzzles; blank and '#' lines are "
+                             "copied through (default: stdout)")
+    parser.set_defaults(run=run_solve)
+
+
+def add_generate_parser(commands):
+    """Register the generate command on an argparse subparsers object."""
+    parser = commands.add_parser("generate", help="generate puzzles in bulk")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--difficulty", default="medium",
+                        choices=["easy", "medium", "hard"])
+    parser.add_argument("--size", type=int, default=9, choices=SIZES,
+                        help="board size (default: 9)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="base seed; the same seed gives the same file")
+    parser.add_argument("--chunk-size", type=int, default=100,
+                        help="puzzles per task handed to a worker")
+    parser.add_argument("--solutions", action="store_true",
+                        help="append ',<solution>' to every line")
+    parser.add_argument("-o", "--output", default="-",
+                        help="output file, one puzzle per line (default: stdout)")
+    parser.set_defaults(run=run_generate)
@@ -0,0 +1,209 @@
+"""
+Sudoku Cache - solved-puzzle cache keyed by canonical grid form
+Puzzles that differ only by relabeling digits, reordering bands or stacks,
+or transposing share one entry. Each lookup maps the cached solution back
+to the caller's orientation and digits.
+"""
+
+import functools
+import itertools
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+@functools.lru_cache(maxsize=None)
+def transforms(size=9, box_size=3):
+    """Return every symmetry as a tuple of source cell indices.
+
+    Cell i of the transformed grid is cell transform[i] of the original.
+    The symmetries are transposition combined with any order of the bands
+    (horizontal groups of boxes) and of the stacks (vertical groups).
+    """
+    result = []
+    orders = list(itertools.permutations(range(box_size)))
+    for transpose in (False, True):
+        for bands in orders:
+            for stacks in orders:
+                source = []
+                for row in range(size):
+                    src_row = bands[row // box_size] * box_size + row % box_size
+                    for col in range(size):
+                        src_col = (stacks[col // box_size] * box_size
+                                   + col % box_size)
+                        if transpose:
+                            source.append(src_col * size + src_row)
+                        else:
+                            source.append(src_row * size + src_col)
+                result.append(tuple(source))
+    return tuple(result)
+
+
+def _relabel(cells, source, size):
+    """Map digits to labels 1..size in order of first appearance.
+
+    Digits that never appear get the remaining labels in ascending order,
+    so the result is always a full bijection.
+    """
+    labels = {}
+    for i in source:
+        num = cells[i]
+        if num and num not in labels:
+            labels[num] = len(labels) + 1
+    for num in range(1, size + 1):
+        if num not in labels:
+            labels[num] = len(labels) + 1
+    return labels
+
+
+def canonical_form(cells, size=9, box_size=3):
+    """Return (key, source, labels) for a flat list of cells.
+
+    key is the smallest relabeled grid over all symmetries, as bytes;
+    source and labels describe how it was obtained from cells.
+    """
+    best = None
+    best_source = None
+    for source in transforms(size, box_size):
+        labels = {}
+        candidate = bytearray()
+        tied = best is not None
+        # Build the relabeled grid cell by cell, dropping this symmetry as
+        # soon as it is known to be larger than the best so far
+        for position, i in enumerate(source):
+            num = cells[i]
+            if num:
+                label = labels.get(num)
+                if label is None:
+                    label = labels[num] = len(labels) + 1
+                num = label
+            if tied:
+                if num > best[position]:
+                    break
+                tied = num == best[position]
+            candidate.append(num)
+        else:
+            if not tied:
+                best = candidate
+                best_source = source
+    return bytes(best), best_source, _relabel(cells, best_source, size)
+
+
+class SolutionCache:
+    """LRU cache of solutions by canonical form, with an optional sqlite tier.
+
+    Memory holds up to max_entries solutions; when path is given, every
+    solution is also written to an sqlite file and read back on a memory
+    miss.
+    """
+
+    def __init__(self, max_entries=10000, path=None, size=9, box_size=3):
+        self.max_entries = max_entries
+        self.path = path
+        self.size = size
+        self.box_size = box_size
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if path is not None:
+            with self._connect() as db:
+                db.execute("CREATE TABLE IF NOT EXISTS solutions ("
+                           "key BLOB PRIMARY KEY, solution BLOB NOT NULL)")
+
+    def _connect(self):
+        """Return this thread's sqlite connection."""
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10)
+            db.execute("PRAGMA journal_mode=WAL")
+            self._local.db = db
+        return db
+
+    def _flatten(self, board):
+        if len(board) != self.size:
+            raise ValueError(f"Cache is for {self.size}x{self.size} boards, "
+                             f"not {len(board)}x{len(board)}")
+        return [num for row in board for num in row]
+
+    def get(self, board):
+        """Return the cached solution of board as a flat list, or None.
+
+        Like put(), raises ValueError for a board of another size.
+        """
+        cells = self._flatten(board)
+        key, source, labels = canonical_form(cells, self.size, self.box_size)
+        with self._lock:
+            solution = self._entries.get(key)
+            if solution is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if solution is None and self.path is not None:
+            row = self._connect().execute(
+                "SELECT solution FROM solutions WHERE key = ?",
+                (key,)).fetchone()
+            if row is not None:
+                solution = row[0]
+                self._remember(key, solution)
+                with self._lock:
+                    self.disk_hits += 1
+        if solution is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        # Undo the relabeling and the symmetry
+        digits = {label: num for num, label in labels.items()}
+        result = [0] * len(cells)
+        for position, i in enumerate(source):
+            result[i] = digits[solution[position]]
+        return result
+
+    def put(self, board, solution):
+        """Cache solution (a grid of the same shape) for board."""
+        cells = self._flatten(board)
+        key, source, labels = canonical_form(cells, self.size, self.box_size)
+        solved = self._flatten(solution)
+        canonical = bytes(labels[solved[i]] for i in source)
+        self._remember(key, canonical)
+        if self.path is not None:
+            db = self._connect()
+            with db:
+                db.execute("INSERT OR REPLACE INTO solutions (key, solution) "
+                           "VALUES (?, ?)", (key, canonical))
+
+    def _remember(self, key, solution):
+        with self._lock:
+            self._entries[key] = solution
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        """Return hit counts, the hit rate and the number of entries."""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+
+@functools.lru_cache(maxsize=None)
+def open_cache(spec="memory", size=9, box_size=3):
+    """Return this process's cache for a spec: "memory" or "sqlite:<path>".
+
+    Calls with the same arguments share one SolutionCache, so solver
+    processes can open it once per puzzle chunk.
+    """
+    if spec == "memory":
+        return SolutionCache(size=size, box_size=box_size)
+    if spec.startswith("sqlite:"):
+        return SolutionCache(path=spec[len("sqlite:"):], size=size,
+                             box_size=box_size)
+    raise ValueError(f"Unknown solution cache: {spec}")
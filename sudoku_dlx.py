@@ -0,0 +1,237 @@
+"""
+Sudoku DLX - exact-cover solver using Dancing Links (Algorithm X)
+Every (row, col, digit) choice is a matrix row covering four constraints:
+the cell is filled, and the digit appears once in its row, column and box.
+Before the matrix is built the board is reduced with the sudoku_grader
+techniques, which leaves far fewer rows on large boards.
+"""
+
+from sudoku_engine import SearchStats
+from sudoku_grader import reduce
+
+
+class DancingLinks:
+    """Sparse exact-cover matrix stored in flat integer arrays.
+
+    Node 0 is the root, nodes 1..columns are the column headers and every
+    later node is a 1 in the matrix. Links are indices into the arrays, so
+    covering and uncovering a column is plain list assignment.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+        headers = range(columns + 1)
+        self.left = [i - 1 for i in headers]
+        self.right = [i + 1 for i in headers]
+        self.left[0] = columns
+        self.right[columns] = 0
+        self.up = list(headers)
+        self.down = list(headers)
+        self.column = list(headers)
+        self.row_id = [-1] * (columns + 1)
+        self.sizes = [0] * (columns + 1)
+
+    def add_row(self, row_id, columns):
+        """Append a matrix row with 1s in the given (0-based) columns."""
+        first = len(self.column)
+        for offset, col in enumerate(columns):
+            header = col + 1
+            node = first + offset
+            self.column.append(header)
+            self.row_id.append(row_id)
+            self.up.append(self.up[header])
+            self.down.append(header)
+            self.down[self.up[header]] = node
+            self.up[header] = node
+            self.left.append(node - 1 if offset else first + len(columns) - 1)
+            self.right.append(node + 1 if offset < len(columns) - 1 else first)
+            self.sizes[header] += 1
+
+    def cover(self, header):
+        """Unlink a column and every row that has a 1 in it."""
+        left, right, up, down = self.left, self.right, self.up, self.down
+        column, sizes = self.column, self.sizes
+        right[left[header]] = right[header]
+        left[right[header]] = left[header]
+        i = down[header]
+        while i != header:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                sizes[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def uncover(self, header):
+        """Undo cover(header)."""
+        left, right, up, down = self.left, self.right, self.up, self.down
+        column, sizes = self.column, self.sizes
+        i = up[header]
+        while i != header:
+            j = left[i]
+            while j != i:
+                sizes[column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[header]] = header
+        left[right[header]] = header
+
+    def search(self, limit=1, on_solution=None, stats=None):
+        """Run Algorithm X and return the number of solutions found.
+
+        Stops after limit solutions. on_solution is called with the list of
+        row ids making up each solution.
+        """
+        if stats is None:
+            stats = SearchStats()
+        right, down, sizes = self.right, self.down, self.sizes
+        column, row_id = self.column, self.row_id
+        chosen = []
+        found = 0
+        trace = stats.trace
+
+        def recurse():
+            nonlocal found
+            depth = len(chosen)
+            stats.nodes += 1
+            if stats.nodes >= stats.check_at:
+                stats.check_budget()
+            if depth > stats.max_depth:
+                stats.max_depth = depth
+            if trace is not None:
+                trace(depth, row_id[chosen[-1]] if chosen else None)
+            if right[0] == 0:
+                found += 1
+                if on_solution is not None:
+                    on_solution([row_id[node] for node in chosen])
+                return found >= limit
+            # Branch on the column with the fewest remaining rows
+            best = right[0]
+            header = right[best]
+            while header != 0:
+                if sizes[header] < sizes[best]:
+                    best = header
+                    if sizes[best] < 2:
+                        break
+                header = right[header]
+            if sizes[best] == 0:
+                return False
+            if sizes[best] == 1:
+                # Only one row can cover this column: a forced placement
+                stats.propagations += 1
+            self.cover(best)
+            node = down[best]
+            while node != best:
+                chosen.append(node)
+                j = right[node]
+                while j != node:
+                    self.cover(column[j])
+                    j = right[j]
+                done = recurse()
+                j = self.left[node]
+                while j != node:
+                    self.uncover(column[j])
+                    j = self.left[j]
+                chosen.pop()
+                if done:
+                    break
+                stats.backtracks += 1
+                node = down[node]
+            self.uncover(best)
+            return found >= limit
+
+        recurse()
+        return found
+
+
+def build_matrix(board, size=9, box_size=3, marks=None):
+    """Build the exact-cover matrix for the empty cells of board.
+
+    Constraints already satisfied by the givens are left out, as are
+    candidates that clash with a given. Returns None if two givens clash.
+    Row ids are (row, col, num) tuples. marks, a flat list of candidate
+    masks such as CandidateGrid.cand, leaves out the digits not in it.
+    """
+    cells = size * size
+
+    def constraints(row, col, num):
+        box = (row // box_size) * box_size + col // box_size
+        digit = num - 1
+        return (row * size + col,
+                cells + row * size + digit,
+                2 * cells + col * size + digit,
+                3 * cells + box * size + digit)
+
+    satisfied = set()
+    for row in range(size):
+        for col in range(size):
+            num = board[row][col]
+            if num:
+                taken = constraints(row, col, num)
+                if satisfied.intersection(taken):
+                    return None
+                satisfied.update(taken)
+
+    index = {}
+    for constraint in range(4 * cells):
+        if constraint not in satisfied:
+            index[constraint] = len(index)
+
+    matrix = DancingLinks(len(index))
+    for row in range(size):
+        for col in range(size):
+            if board[row][col]:
+                continue
+            allowed = marks[row * size + col] if marks is not None else -1
+            for num in range(1, size + 1):
+                if not allowed >> (num - 1) & 1:
+                    continue
+                taken = constraints(row, col, num)
+                if satisfied.intersection(taken):
+                    continue
+                matrix.add_row((row, col, num), [index[c] for c in taken])
+    return matrix
+
+
+def _reduced_matrix(board, size, box_size, stats):
+    """Reduce board with logic and build the matrix for what is left.
+
+    Returns (matrix, grid), with matrix None if there is no solution.
+    """
+    if stats is None:
+        stats = SearchStats()
+    grid = reduce(board, size, box_size)
+    if grid.broken:
+        return None, grid
+    stats.propagations += sum(1 for row in board for num in row if not num) - grid.empty
+    rows = [grid.cells[row * size:(row + 1) * size] for row in range(size)]
+    return build_matrix(rows, size, box_size, grid.cand), grid
+
+
+def dlx(board, state, stats=None):
+    """Fill board in place with the first exact cover found."""
+    size = state.size
+    matrix, grid = _reduced_matrix(board, size, state.box_size, stats)
+    if matrix is None:
+        return False
+    result = []
+    if not matrix.search(1, result.extend, stats):
+        return False
+    for i, num in enumerate(grid.cells):
+        if num and not board[i // size][i % size]:
+            result.append((i // size, i % size, num))
+    for row, col, num in result:
+        board[row][col] = num
+        state.place(row, col, num)
+    return True
+
+
+def count_solutions(board, size=9, box_size=3, limit=2, stats=None):
+    """Count the solutions of board, stopping once limit have been found."""
+    matrix, _ = _reduced_matrix(board, size, box_size, stats)
+    if matrix is None:
+        return 0
+    return matrix.search(limit, stats=stats)
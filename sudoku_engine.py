@@ -0,0 +1,523 @@
+"""
+Sudoku Engine - bitmask constraint bookkeeping and search
+Keeps track of which digits are used in every row, column and box so that
+a validity check is a single bit test instead of a scan of the board.
+"""
+
+import functools
+import sys
+import time
+
+
+class ConstraintState:
+    """Per-row, per-column and per-box digit masks for one board.
+
+    Digit ``n`` is stored as bit ``1 << (n - 1)``. The masks are updated
+    incrementally with ``place`` and ``remove``; a per-unit count of every
+    digit is kept alongside so that clearing one of two clashing entries
+    (which players are allowed to make) leaves the other one recorded.
+    """
+
+    __slots__ = ("size", "box_size", "full_mask", "rows", "cols", "boxes",
+                 "counts")
+
+    def __init__(self, size=9, box_size=3):
+        self.size = size
+        self.box_size = box_size
+        self.full_mask = (1 << size) - 1
+        self.rows = [0] * size
+        self.cols = [0] * size
+        self.boxes = [0] * size
+        self.counts = bytearray(3 * size * size)
+
+    @classmethod
+    def from_board(cls, board, size=9, box_size=3):
+        """Build the masks for an existing board."""
+        state = cls(size, box_size)
+        for row in range(size):
+            for col in range(size):
+                num = board[row][col]
+                if num:
+                    state.place(row, col, num)
+        return state
+
+    def box_index(self, row, col):
+        """Return the index of the box containing (row, col)."""
+        return (row // self.box_size) * self.box_size + col // self.box_size
+
+    def used(self, row, col):
+        """Return the mask of digits already used in the cell's units."""
+        return (self.rows[row] | self.cols[col]
+                | self.boxes[self.box_index(row, col)])
+
+    def candidates(self, row, col):
+        """Return the mask of digits that could still go in (row, col)."""
+        return self.full_mask & ~self.used(row, col)
+
+    def can_place(self, row, col, num):
+        """Check if num is absent from the row, column and box of (row, col)."""
+        return not self.used(row, col) & (1 << (num - 1))
+
+    def clashes(self, row, col, num):
+        """Check if num occurs more than once in a unit of (row, col)."""
+        size = self.size
+        counts = self.counts
+        return (counts[row * size + num - 1] > 1
+                or counts[(size + col) * size + num - 1] > 1
+                or counts[(2 * size + self.box_index(row, col)) * size + num - 1] > 1)
+
+    def place(self, row, col, num):
+        """Record num as placed at (row, col)."""
+        size = self.size
+        bit = 1 << (num - 1)
+        box = self.box_index(row, col)
+        counts = self.counts
+        counts[row * size + num - 1] += 1
+        counts[(size + col) * size + num - 1] += 1
+        counts[(2 * size + box) * size + num - 1] += 1
+        self.rows[row] |= bit
+        self.cols[col] |= bit
+        self.boxes[box] |= bit
+
+    def remove(self, row, col, num):
+        """Forget num at (row, col), keeping bits still used by another cell."""
+        size = self.size
+        bit = 1 << (num - 1)
+        box = self.box_index(row, col)
+        counts = self.counts
+        idx = row * size + num - 1
+        counts[idx] -= 1
+        if not counts[idx]:
+            self.rows[row] &= ~bit
+        idx = (size + col) * size + num - 1
+        counts[idx] -= 1
+        if not counts[idx]:
+            self.cols[col] &= ~bit
+        idx = (2 * size + box) * size + num - 1
+        counts[idx] -= 1
+        if not counts[idx]:
+            self.boxes[box] &= ~bit
+
+
+@functools.lru_cache(maxsize=None)
+def peers(size=9, box_size=3):
+    """Return, for every cell index, the (row, col) cells sharing a unit."""
+    result = []
+    for cell in range(size * size):
+        row, col = divmod(cell, size)
+        top = row - row % box_size
+        left = col - col % box_size
+        seen = {(row, c) for c in range(size)}
+        seen.update((r, col) for r in range(size))
+        seen.update((top + i, left + j)
+                    for i in range(box_size) for j in range(box_size))
+        seen.discard((row, col))
+        result.append(tuple(sorted(seen)))
+    return tuple(result)
+
+
+class BudgetExceeded(Exception):
+    """Raised out of a search that ran past its SearchBudget.
+
+    reason is "nodes", "time" or "cancelled".
+    """
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+
+    def __reduce__(self):
+        # Keep the reason when raised out of a worker process
+        return type(self), (self.reason, str(self))
+
+
+class CancelToken:
+    """Flag a running search checks; cancel() makes it stop."""
+
+    __slots__ = ("cancelled",)
+
+    def __init__(self):
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class SearchBudget:
+    """Limits on a search: nodes per search, a deadline and a cancel token.
+
+    max_nodes applies to each search separately; time_limit (seconds)
+    starts counting when the budget is created, so one budget passed to
+    several searches bounds them all together. The limits are checked
+    every check_every nodes, and BudgetExceeded is raised when one is hit.
+    """
+
+    def __init__(self, max_nodes=None, time_limit=None, token=None,
+                 check_every=256):
+        self.max_nodes = max_nodes
+        self.deadline = (time.monotonic() + time_limit
+                         if time_limit is not None else None)
+        self.time_limit = time_limit
+        self.token = token
+        self.check_every = check_every
+
+    def next_check(self, nodes):
+        """Return the node count at which the search should check again."""
+        due = nodes + self.check_every
+        if self.max_nodes is not None:
+            due = min(due, self.max_nodes + 1)
+        return due
+
+    def check(self, nodes):
+        """Raise BudgetExceeded if a limit is hit; else return next_check."""
+        if self.token is not None and self.token.cancelled:
+            raise BudgetExceeded("cancelled", "Search cancelled")
+        if self.max_nodes is not None and nodes > self.max_nodes:
+            raise BudgetExceeded(
+                "nodes", f"Search budget of {self.max_nodes} nodes exceeded")
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise BudgetExceeded(
+                "time", f"Search time limit of {self.time_limit}s exceeded")
+        return self.next_check(nodes)
+
+
+class SearchStats:
+    """Counters collected while solving one board.
+
+    nodes counts search calls, backtracks the branches that were undone,
+    max_depth the deepest branch and propagations the digits placed by
+    propagation rather than by branching. If trace is given it is called
+    as trace(depth, move) on entering every node, where move is the
+    (row, col, num) choice that led there, or None at the root.
+
+    With a SearchBudget the limits are checked once up front (so a
+    cancelled or expired budget stops even a short search) and then by
+    check_budget() whenever nodes reaches check_at; without one check_at
+    is never reached.
+    """
+
+    __slots__ = ("nodes", "backtracks", "max_depth", "propagations", "trace",
+                 "budget", "check_at")
+
+    def __init__(self, trace=None, budget=None):
+        self.nodes = 0
+        self.backtracks = 0
+        self.max_depth = 0
+        self.propagations = 0
+        self.trace = trace
+        self.budget = budget
+        self.check_at = budget.check(0) if budget else sys.maxsize
+
+    def check_budget(self):
+        """Check the budget; raises BudgetExceeded when it is used up."""
+        self.check_at = self.budget.check(self.nodes)
+
+    def add(self, other):
+        """Fold the counters of another search into this one."""
+        self.nodes += other.nodes
+        self.backtracks += other.backtracks
+        self.max_depth = max(self.max_depth, other.max_depth)
+        self.propagations += other.propagations
+
+    def as_dict(self):
+        """Return the counters as a dict, for JSON and metrics."""
+        return {'nodes': self.nodes, 'backtracks': self.backtracks,
+                'max_depth': self.max_depth,
+                'propagations': self.propagations}
+
+    def __repr__(self):
+        return (f"SearchStats(nodes={self.nodes}, backtracks={self.backtracks}, "
+                f"max_depth={self.max_depth}, "
+                f"propagations={self.propagations})")
+
+
+def _sync_counts(state, filled):
+    """Add the digits a search wrote into the masks to the unit counts.
+
+    The searches toggle the row/column/box masks directly for speed and
+    only ever place a digit that is absent from all three units, so the
+    counts can be brought in line once at the end.
+    """
+    size = state.size
+    counts = state.counts
+    for row, col, num in filled:
+        digit = num - 1
+        box = state.box_index(row, col)
+        counts[row * size + digit] += 1
+        counts[(size + col) * size + digit] += 1
+        counts[(2 * size + box) * size + digit] += 1
+
+
+def backtrack(board, state, stats=None):
+    """Fill the empty cells of board in place, row-major, trying 1..size.
+
+    This is the same search order as the original list-scanning solver, so
+    it finds the same solution; only the validity test has changed.
+    """
+    if stats is None:
+        stats = SearchStats()
+    size = state.size
+    box_size = state.box_size
+    rows, cols, boxes = state.rows, state.cols, state.boxes
+    full = state.full_mask
+    empties = [(row, col, (row // box_size) * box_size + col // box_size)
+               for row in range(size) for col in range(size)
+               if board[row][col] == 0]
+    found = [0] * len(empties)
+    trace = stats.trace
+
+    def search(k):
+        stats.nodes += 1
+        if stats.nodes >= stats.check_at:
+            stats.check_budget()
+        if k > stats.max_depth:
+            stats.max_depth = k
+        if trace is not None:
+            trace(k, (empties[k - 1][0], empties[k - 1][1],
+                      found[k - 1].bit_length()) if k else None)
+        if k == len(empties):
+            return True
+        row, col, box = empties[k]
+        free = full & ~(rows[row] | cols[col] | boxes[box])
+        while free:
+            bit = free & -free
+            free ^= bit
+            found[k] = bit
+            rows[row] |= bit
+            cols[col] |= bit
+            boxes[box] |= bit
+            if search(k + 1):
+                return True
+            rows[row] ^= bit
+            cols[col] ^= bit
+            boxes[box] ^= bit
+            stats.backtracks += 1
+        return False
+
+    if not search(0):
+        return False
+    filled = []
+    for (row, col, _), bit in zip(empties, found):
+        board[row][col] = bit.bit_length()
+        filled.append((row, col, bit.bit_length()))
+    _sync_counts(state, filled)
+    return True
+
+
+def _units(size, box_size):
+    """Return the cell indices of every row, column and box."""
+    units = [[row * size + col for col in range(size)] for row in range(size)]
+    units += [[row * size + col for row in range(size)] for col in range(size)]
+    for box in range(size):
+        top = (box // box_size) * box_size
+        left = (box % box_size) * box_size
+        units.append([(top + i) * size + left + j
+                      for i in range(box_size) for j in range(box_size)])
+    return units
+
+
+def mrv(board, state, stats=None, limit=None):
+    """Fill board in place, branching on the cell with fewest candidates.
+
+    Before every branch the board is closed under naked singles (a cell
+    with one candidate left) and hidden singles (a digit with one place
+    left in a row, column or box). On boards above 9x9, when those run
+    out, the sudoku_grader eliminations (locked candidates, subsets and
+    X-Wing) are tried before branching, and the singles start again after
+    each one that removes a candidate. Returns False if there is no
+    solution.
+
+    With limit, the solutions are counted instead, stopping once limit
+    have been found; the count is returned and board and state are left
+    untouched.
+    """
+    # Imported here as sudoku_grader itself imports this module
+    from sudoku_grader import ELIMINATORS, CandidateGrid
+
+    if stats is None:
+        stats = SearchStats()
+    size = state.size
+    box_size = state.box_size
+    rows, cols, boxes = state.rows, state.cols, state.boxes
+    if limit is not None:
+        rows, cols, boxes = rows[:], cols[:], boxes[:]
+    unit_masks = [rows, cols, boxes]
+    full = state.full_mask
+    count = size * size
+    cells = [board[i // size][i % size] for i in range(count)]
+    row_of = [i // size for i in range(count)]
+    col_of = [i % size for i in range(count)]
+    box_of = [(i // size // box_size) * box_size + (i % size) // box_size
+              for i in range(count)]
+    units = _units(size, box_size)
+    # Candidates removed by the grader's techniques, on top of the masks,
+    # and the pencil-mark grid those techniques are run on
+    removed = [0] * count
+    grid = None
+    # A 9x9 branch costs less than looking for an elimination
+    eliminators = ELIMINATORS if size > 9 else ()
+    trace = stats.trace
+
+    def place(i, bit, trail):
+        cells[i] = bit.bit_length()
+        rows[row_of[i]] |= bit
+        cols[col_of[i]] |= bit
+        boxes[box_of[i]] |= bit
+        trail.append(i)
+
+    def undo(trail):
+        for i in trail:
+            bit = 1 << (cells[i] - 1)
+            rows[row_of[i]] ^= bit
+            cols[col_of[i]] ^= bit
+            boxes[box_of[i]] ^= bit
+            cells[i] = 0
+
+    def restore(cleared):
+        for i, bits in cleared:
+            removed[i] ^= bits
+
+    def eliminate(cleared):
+        """Apply the easiest grader elimination; return False if none."""
+        nonlocal grid
+        # A pass costs as much as hundreds of plain nodes, so the budget
+        # is checked before each one rather than every check_every nodes
+        if stats.budget is not None:
+            stats.check_budget()
+        if grid is None:
+            grid = CandidateGrid(None, size, box_size)
+        cand = grid.cand
+        for i in range(count):
+            cand[i] = 0 if cells[i] else full & ~(
+                rows[row_of[i]] | cols[col_of[i]] | boxes[box_of[i]] | removed[i])
+        for finder in eliminators:
+            step = finder(grid)
+            if step is not None:
+                for i, mask in step.eliminations:
+                    bits = mask & cand[i]
+                    if bits:
+                        cand[i] ^= bits
+                        removed[i] |= bits
+                        cleared.append((i, bits))
+                return True
+        return False
+
+    def propagate(trail, cleared):
+        """Place forced digits; return False on a contradiction."""
+        progress = True
+        while progress:
+            progress = False
+            open_cells = 0
+            for i in range(count):
+                if cells[i]:
+                    continue
+                free = full & ~(rows[row_of[i]] | cols[col_of[i]]
+                                | boxes[box_of[i]] | removed[i])
+                if not free:
+                    return False
+                if not free & (free - 1):
+                    place(i, free, trail)
+                    progress = True
+                else:
+                    open_cells += 1
+            if progress or not open_cells:
+                continue
+            for u, unit in enumerate(units):
+                once = twice = 0
+                for i in unit:
+                    if not cells[i]:
+                        free = full & ~(rows[row_of[i]] | cols[col_of[i]]
+                                        | boxes[box_of[i]] | removed[i])
+                        twice |= once & free
+                        once |= free
+                if (once | unit_masks[u // size][u % size]) != full:
+                    return False
+                single = once & ~twice
+                while single:
+                    bit = single & -single
+                    single ^= bit
+                    for i in unit:
+                        if not cells[i] and not (
+                                rows[row_of[i]] | cols[col_of[i]]
+                                | boxes[box_of[i]] | removed[i]) & bit:
+                            place(i, bit, trail)
+                            progress = True
+                            break
+            if not progress and eliminators:
+                progress = eliminate(cleared)
+        return True
+
+    def search(depth, move):
+        stats.nodes += 1
+        if stats.nodes >= stats.check_at:
+            stats.check_budget()
+        if depth > stats.max_depth:
+            stats.max_depth = depth
+        if trace is not None:
+            trace(depth, move)
+        trail = []
+        cleared = []
+        ok = propagate(trail, cleared)
+        stats.propagations += len(trail)
+        if not ok:
+            undo(trail)
+            restore(cleared)
+            return False
+        best = -1
+        best_free = 0
+        best_count = size + 1
+        for i in range(count):
+            if cells[i]:
+                continue
+            free = full & ~(rows[row_of[i]] | cols[col_of[i]]
+                            | boxes[box_of[i]] | removed[i])
+            n = bin(free).count("1")
+            if n < best_count:
+                best, best_free, best_count = i, free, n
+                if n == 2:
+                    break
+        if best < 0:
+            if limit is None:
+                return True
+            found[0] += 1
+            undo(trail)
+            restore(cleared)
+            return found[0] >= limit
+        while best_free:
+            bit = best_free & -best_free
+            best_free ^= bit
+            branch = []
+            place(best, bit, branch)
+            if search(depth + 1,
+                      (row_of[best], col_of[best], bit.bit_length())):
+                return True
+            undo(branch)
+            stats.backtracks += 1
+        undo(trail)
+        restore(cleared)
+        return False
+
+    found = [0]
+    solved = search(0, None)
+    if limit is not None:
+        return found[0]
+    if not solved:
+        return False
+    filled = []
+    for i in range(count):
+        row, col = row_of[i], col_of[i]
+        if board[row][col] == 0:
+            board[row][col] = cells[i]
+            filled.append((row, col, cells[i]))
+    _sync_counts(state, filled)
+    return True
+
+
+def count_solutions(board, size=9, box_size=3, limit=2, stats=None):
+    """Count the solutions of board with mrv, stopping once limit are found.
+
+    No exact cover matrix is built, so on boards with few empty cells this
+    is much cheaper than sudoku_dlx.count_solutions.
+    """
+    state = ConstraintState.from_board(board, size, box_size)
+    return mrv(board, state, stats, limit)
@@ -0,0 +1,480 @@
+"""
+Sudoku Grader - rate puzzles by the logical techniques they need
+A pencil-mark grid is solved step by step with the easiest technique that
+makes progress; the hardest technique used decides the rating. Candidates
+are updated incrementally as digits are placed and eliminated, so grading
+a puzzle costs a few milliseconds.
+"""
+
+import functools
+import itertools
+from collections import Counter, namedtuple
+
+from sudoku_engine import peers
+
+# Techniques from easiest to hardest, with the level each one rates
+TECHNIQUES = (
+    ("hidden_single", 1),
+    ("naked_single", 2),
+    ("pointing", 3),
+    ("box_line", 3),
+    ("naked_pair", 4),
+    ("hidden_pair", 4),
+    ("naked_triple", 5),
+    ("hidden_triple", 5),
+    ("x_wing", 6),
+)
+LEVELS = dict(TECHNIQUES)
+
+# Rating -> (lowest, highest) level of the hardest technique it needs:
+# singles only, then intersections, then subsets and X-Wing. Puzzles the
+# techniques cannot finish are rated "expert" (they need guessing).
+RATING_LEVELS = {
+    "easy": (0, 2),
+    "medium": (3, 3),
+    "hard": (4, 6),
+}
+
+# One round of a technique: digits placed as (cell, num) and candidates
+# removed as (cell, mask). Cells are flat indices. The singles and the
+# locked candidates put everything they see into one Step; the other
+# techniques make one deduction.
+Step = namedtuple("Step", "technique placements eliminations")
+
+# Result of grade(): the rating, the level and name of the hardest
+# technique used (0 and None if no step was needed), how often each
+# technique was used, whether the techniques finished the puzzle and the
+# (row, col) cells they left empty
+Grade = namedtuple("Grade", "rating level hardest counts solved unsolved")
+
+# Result of find_hint(): the cell to fill and its digit, the hardest
+# technique needed to find it and every technique used, in order (the
+# eliminations that lead up to the placement, then the placement itself)
+Hint = namedtuple("Hint", "row col num technique steps")
+
+
+def _bits(mask):
+    """Yield the single-bit masks set in mask."""
+    while mask:
+        bit = mask & -mask
+        mask ^= bit
+        yield bit
+
+
+@functools.lru_cache(maxsize=None)
+def layout(size=9, box_size=3):
+    """Return (peers, rows, cols, boxes, box_of) as flat cell indices."""
+    count = size * size
+    flat_peers = tuple(tuple(r * size + c for r, c in cell_peers)
+                       for cell_peers in peers(size, box_size))
+    rows = tuple(tuple(row * size + col for col in range(size))
+                 for row in range(size))
+    cols = tuple(tuple(row * size + col for row in range(size))
+                 for col in range(size))
+    boxes = []
+    for box in range(size):
+        top = (box // box_size) * box_size
+        left = (box % box_size) * box_size
+        boxes.append(tuple((top + i) * size + left + j
+                           for i in range(box_size) for j in range(box_size)))
+    box_of = tuple((i // size // box_size) * box_size + (i % size) // box_size
+                   for i in range(count))
+    return flat_peers, rows, cols, tuple(boxes), box_of
+
+
+class CandidateGrid:
+    """Digits and pencil marks of a board, kept as flat per-cell lists.
+
+    cand[i] is the mask of digits still possible at empty cell i (bit
+    1 << (n - 1) for digit n) and 0 for filled cells. place() and
+    eliminate() update the marks of the affected cells only, and set
+    broken if that leaves an empty cell with no candidate. A board of
+    None gives an empty grid.
+    """
+
+    def __init__(self, board, size=9, box_size=3):
+        self.size = size
+        self.box_size = box_size
+        count = size * size
+        self.full_mask = (1 << size) - 1
+        (self.peers, self.rows, self.cols, self.boxes,
+         self.box_of) = layout(size, box_size)
+        self.units = self.rows + self.cols + self.boxes
+        self.broken = False
+        if board is None:
+            self.cells = [0] * count
+            self.cand = [self.full_mask] * count
+            self.empty = count
+            return
+        self.cells = [board[i // size][i % size] for i in range(count)]
+        self.empty = 0
+        self.cand = [0] * count
+        cells = self.cells
+        for i in range(count):
+            if cells[i]:
+                continue
+            self.empty += 1
+            used = 0
+            for p in self.peers[i]:
+                if cells[p]:
+                    used |= 1 << (cells[p] - 1)
+            self.cand[i] = self.full_mask & ~used
+            if not self.cand[i]:
+                self.broken = True
+
+    def place(self, i, num):
+        """Fill cell i with num and drop num from its peers' marks."""
+        if not self.cells[i]:
+            self.empty -= 1
+        self.cells[i] = num
+        cand = self.cand
+        cand[i] = 0
+        bit = 1 << (num - 1)
+        cells = self.cells
+        for p in self.peers[i]:
+            if cand[p] & bit:
+                cand[p] ^= bit
+                if not cand[p]:
+                    self.broken = True
+            elif cells[p] == num:
+                self.broken = True
+
+    def eliminate(self, i, mask):
+        """Remove the digits in mask from the marks of cell i."""
+        if self.cand[i] & mask:
+            self.cand[i] &= ~mask
+            if not self.cand[i]:
+                self.broken = True
+
+    def update(self, i, num, state):
+        """Set cell i of a live board to num (0 to clear it).
+
+        The marks of i and its peers are read back from state, the board's
+        ConstraintState (already updated for the move), so only 1 + peers
+        cells are touched. Eliminations made by techniques are not kept.
+        """
+        size = self.size
+        cells, cand = self.cells, self.cand
+        self.empty += (num == 0) - (cells[i] == 0)
+        cells[i] = num
+        for j in (i,) + self.peers[i]:
+            cand[j] = 0 if cells[j] else state.candidates(j // size, j % size)
+
+    def copy(self):
+        """Return an independent copy, for trying steps on a live grid."""
+        grid = object.__new__(CandidateGrid)
+        grid.__dict__.update(self.__dict__)
+        grid.cells = self.cells[:]
+        grid.cand = self.cand[:]
+        grid.broken = any(not mask and not num
+                          for mask, num in zip(grid.cand, grid.cells))
+        return grid
+
+    def apply(self, step):
+        """Carry out a Step."""
+        for i, mask in step.eliminations:
+            self.eliminate(i, mask)
+        for i, num in step.placements:
+            if not self.cells[i]:
+                self.place(i, num)
+
+
+def hidden_single(grid):
+    """Digits with one possible cell in a row, column or box.
+
+    Like naked_single, every single visible at once goes into one Step.
+    """
+    cand = grid.cand
+    placements = []
+    for unit in grid.units:
+        once = twice = 0
+        for i in unit:
+            twice |= once & cand[i]
+            once |= cand[i]
+        single = once & ~twice
+        while single:
+            bit = single & -single
+            single ^= bit
+            for i in unit:
+                if cand[i] & bit:
+                    placements.append((i, bit.bit_length()))
+                    break
+    if placements:
+        return Step("hidden_single", placements, [])
+    return None
+
+
+def naked_single(grid):
+    """Cells with one candidate left."""
+    placements = [(i, mask.bit_length()) for i, mask in enumerate(grid.cand)
+                  if mask and not mask & (mask - 1)]
+    if placements:
+        return Step("naked_single", placements, [])
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def intersections(size=9, box_size=3):
+    """Return the (inside, outside) cell groups for pointing and box_line.
+
+    Each is a tuple with one entry per unit and direction: the unit's
+    cells split by the crossing line (row, column or box) they lie on, as
+    (cells of the unit on that line, the rest of that line).
+    """
+    _, rows, cols, boxes, box_of = layout(size, box_size)
+
+    def split(unit, line_of):
+        groups = {}
+        for i in unit:
+            groups.setdefault(line_of(i), []).append(i)
+        return tuple((tuple(inside), tuple(i for i in line if i not in inside))
+                     for line, inside in groups.items())
+
+    pointing = []
+    for box in boxes:
+        pointing.append(split(box, lambda i: rows[i // size]))
+        pointing.append(split(box, lambda i: cols[i % size]))
+    box_line = [split(line, lambda i: boxes[box_of[i]]) for line in rows + cols]
+    return tuple(pointing), tuple(box_line)
+
+
+def _locked(grid, technique, units):
+    """Shared search for pointing and box/line reduction.
+
+    units holds every unit split into its (inside, outside) groups by a
+    crossing line. A digit whose cells in the unit all fall in one group
+    can be removed from the outside of that group. Every such removal
+    goes into one Step, so a cell may be listed more than once.
+    """
+    cand = grid.cand
+    removals = []
+    for groups in units:
+        once = twice = 0
+        masks = []
+        for inside, _ in groups:
+            mask = 0
+            for i in inside:
+                mask |= cand[i]
+            masks.append(mask)
+            twice |= once & mask
+            once |= mask
+        confined = once & ~twice
+        if not confined:
+            continue
+        for (_, outside), mask in zip(groups, masks):
+            for bit in _bits(confined & mask):
+                removals.extend((i, bit) for i in outside if cand[i] & bit)
+    if removals:
+        return Step(technique, [], removals)
+    return None
+
+
+def pointing(grid):
+    """A box's cells for a digit share a row or column: clear the rest of it."""
+    return _locked(grid, "pointing",
+                   intersections(grid.size, grid.box_size)[0])
+
+
+def box_line(grid):
+    """A row's or column's cells for a digit share a box: clear the rest of it."""
+    return _locked(grid, "box_line",
+                   intersections(grid.size, grid.box_size)[1])
+
+
+def _naked_subset(grid, k, technique):
+    """k cells of a unit whose marks span k digits: clear those elsewhere."""
+    cand = grid.cand
+    for unit in grid.units:
+        open_cells = [i for i in unit if cand[i]]
+        if len(open_cells) <= k:
+            continue
+        small = [i for i in open_cells if bin(cand[i]).count("1") <= k]
+        for group in itertools.combinations(small, k):
+            union = 0
+            for i in group:
+                union |= cand[i]
+            if bin(union).count("1") != k:
+                continue
+            removals = [(i, union) for i in open_cells
+                        if i not in group and cand[i] & union]
+            if removals:
+                return Step(technique, [], removals)
+    return None
+
+
+def _hidden_subset(grid, k, technique):
+    """k digits confined to k cells of a unit: clear other marks there."""
+    cand = grid.cand
+    for unit in grid.units:
+        open_cells = [i for i in unit if cand[i]]
+        if len(open_cells) <= k:
+            continue
+        # seen[j] holds the digits marked in more than j of the cells, so
+        # only those in at most k cells need their places listed
+        seen = [0] * (k + 1)
+        for i in open_cells:
+            mask = cand[i]
+            for j in range(k, 0, -1):
+                seen[j] |= seen[j - 1] & mask
+            seen[0] |= mask
+        few = seen[0] & ~seen[k]
+        if bin(few).count("1") < k:
+            continue
+        places = {bit: [i for i in open_cells if cand[i] & bit]
+                  for bit in _bits(few)}
+        for group in itertools.combinations(places, k):
+            cells = set()
+            for bit in group:
+                cells.update(places[bit])
+            if len(cells) != k:
+                continue
+            mask = sum(group)
+            removals = [(i, cand[i] & ~mask) for i in sorted(cells)
+                        if cand[i] & ~mask]
+            if removals:
+                return Step(technique, [], removals)
+    return None
+
+
+def naked_pair(grid):
+    return _naked_subset(grid, 2, "naked_pair")
+
+
+def hidden_pair(grid):
+    return _hidden_subset(grid, 2, "hidden_pair")
+
+
+def naked_triple(grid):
+    return _naked_subset(grid, 3, "naked_triple")
+
+
+def hidden_triple(grid):
+    return _hidden_subset(grid, 3, "hidden_triple")
+
+
+def x_wing(grid):
+    """A digit in two rows (columns) using the same two columns (rows)."""
+    cand = grid.cand
+    size = grid.size
+    for lines, position, crossing in ((grid.rows, lambda i: i % size, grid.cols),
+                                      (grid.cols, lambda i: i // size, grid.rows)):
+        for bit in (1 << d for d in range(size)):
+            pairs = {}
+            for index, line in enumerate(lines):
+                where = tuple(position(i) for i in line if cand[i] & bit)
+                if len(where) == 2:
+                    pairs.setdefault(where, []).append(index)
+            for where, found in pairs.items():
+                if len(found) < 2:
+                    continue
+                for first, second in itertools.combinations(found, 2):
+                    removals = [(i, bit) for p in where for i in crossing[p]
+                                if cand[i] & bit
+                                and i not in lines[first]
+                                and i not in lines[second]]
+                    if removals:
+                        return Step("x_wing", [], removals)
+    return None
+
+
+# Technique name -> finder, in TECHNIQUES order
+FINDERS = {
+    "hidden_single": hidden_single,
+    "naked_single": naked_single,
+    "pointing": pointing,
+    "box_line": box_line,
+    "naked_pair": naked_pair,
+    "hidden_pair": hidden_pair,
+    "naked_triple": naked_triple,
+    "hidden_triple": hidden_triple,
+    "x_wing": x_wing,
+}
+
+# The finders that only remove candidates, easiest first; sudoku_engine.mrv
+# runs these when the singles are stuck
+ELIMINATORS = tuple(FINDERS[technique] for technique, level in TECHNIQUES
+                    if level > LEVELS["naked_single"])
+
+
+def next_step(grid, max_level=None):
+    """Return the easiest Step available on grid, or None.
+
+    Techniques above max_level are not tried.
+    """
+    for technique, level in TECHNIQUES:
+        if max_level is not None and level > max_level:
+            break
+        step = FINDERS[technique](grid)
+        if step is not None:
+            return step
+    return None
+
+
+def reduce(board, size=9, box_size=3, max_level=None):
+    """Apply techniques to board until none helps; return the CandidateGrid.
+
+    The grid may still have empty cells, or be broken if board has no
+    solution.
+    """
+    grid = CandidateGrid(board, size, box_size)
+    while grid.empty and not grid.broken:
+        step = next_step(grid, max_level)
+        if step is None:
+            break
+        grid.apply(step)
+    return grid
+
+
+def rating_for(level):
+    """Return the rating name for a hardest technique level."""
+    for rating, (low, high) in RATING_LEVELS.items():
+        if low <= level <= high:
+            return rating
+    return "expert"
+
+
+def grade(board, size=9, box_size=3, max_level=None):
+    """Solve board with logic alone and rate it; returns a Grade.
+
+    With max_level, grading stops (unsolved, rated "expert") as soon as a
+    harder technique would be needed.
+    """
+    grid = CandidateGrid(board, size, box_size)
+    counts = Counter()
+    hardest = None
+    while grid.empty and not grid.broken:
+        step = next_step(grid, max_level)
+        if step is None:
+            break
+        grid.apply(step)
+        counts[step.technique] += len(step.placements) or 1
+        if hardest is None or LEVELS[step.technique] > LEVELS[hardest]:
+            hardest = step.technique
+    level = LEVELS[hardest] if hardest else 0
+    if grid.empty or grid.broken:
+        unsolved = [divmod(i, size) for i, num in enumerate(grid.cells)
+                    if not num]
+        return Grade("expert", level, hardest, counts, False, unsolved)
+    return Grade(rating_for(level), level, hardest, counts, True, [])
+
+
+def find_hint(grid, max_level=None):
+    """Return a Hint for the next cell logic can fill on grid, or None.
+
+    Techniques are tried as in grade(); eliminations are made on a copy,
+    so grid itself is left unchanged.
+    """
+    grid = grid.copy()
+    steps = []
+    while grid.empty and not grid.broken:
+        step = next_step(grid, max_level)
+        if step is None:
+            break
+        steps.append(step.technique)
+        if step.placements:
+            i, num = step.placements[0]
+            row, col = divmod(i, grid.size)
+            hardest = max(steps, key=LEVELS.get)
+            return Hint(row, col, num, hardest, tuple(steps))
+        grid.apply(step)
+    return None
@@ -7,9 +7,15 @@ Note: On macOS, this requires Tkinter which comes with the system Python.
 Run with: /usr/bin/python3 sudoku_gui.py
 """
 
+import queue
+import threading
 import tkinter as tk
 from tkinter import messagebox, ttk
-from sudoku import Sudoku
+from sudoku_engine import CancelToken
+from sudoku_pool import create_game
+
+# How often the Tk loop checks for a finished puzzle, in milliseconds
+POLL_MS = 50
 
 class SudokuGUI:
     def __init__(self, root):
@@ -29,8 +35,16 @@ class SudokuGUI:
         self.game = None
         self.selected_cell = None
         self.cells = {}
+        # What each cell currently shows, as (text, colour, font), so a
+        # redraw only touches the cells that changed
         self.cell_values = {}
         
+        # Puzzles are generated on a worker thread, which hands them back
+        # through this queue as (token, game, error); the token of the
+        # generation still wanted is kept so stale results are dropped
+        self.results = queue.Queue()
+        self.generation = None
+        
         # Configure root
         self.root.configure(bg=self.bg_color)
         
@@ -57,6 +71,7 @@ class SudokuGUI:
         control_frame.grid(row=1, column=1, sticky="n")
         
         self.create_control_panel(control_frame)
+        self.create_board()
         
         # Show difficulty selection
         self.show_difficulty_selection()
@@ -168,11 +183,10 @@ class SudokuGUI:
         instructions.config(state=tk.DISABLED)
     
     def create_board(self):
-        """Create the Sudoku board grid."""
-        # Clear existing board
-        for widget in self.board_frame.winfo_children():
-            widget.destroy()
+        """Create the Sudoku board grid and the generation progress bar.
         
+        The canvas items are made once; render_board updates them.
+        """
         self.cells = {}
         self.cell_values = {}
         
@@ -211,7 +225,7 @@ class SudokuGUI:
                 fill=color
             )
         
-        # Create cells
+        # Create cells, empty until a game arrives
         for row in range(9):
             for col in range(9):
                 x1 = col * cell_size
@@ -227,23 +241,17 @@ class SudokuGUI:
                 )
                 
                 # Cell text
-                value = self.game.board[row][col]
-                display_text = str(value) if value != 0 else ""
-                
-                is_original = self.game.is_cell_original(row, col)
-                text_color = self.original_color if is_original else self.player_color
-                font_weight = "bold" if is_original else "normal"
-                
                 cell_text = canvas.create_text(
                     (x1 + x2) // 2,
                     (y1 + y2) // 2,
-                    text=display_text,
-                    font=("Arial", 20, font_weight),
-                    fill=text_color
+                    text="",
+                    font=("Arial", 20, "normal"),
+                    fill=self.player_color
                 )
                 
                 self.cells[(row, col)] = (cell_bg, cell_text)
-                self.cell_values[(row, col)] = value
+                self.cell_values[(row, col)] = ("", self.player_color,
+                                                ("Arial", 20, "normal"))
                 
                 # Bind click event
                 canvas.tag_bind(cell_bg, "<Button-1>", lambda e, r=row, c=col: self.select_cell(r, c))
@@ -251,13 +259,54 @@ class SudokuGUI:
         
         self.canvas = canvas
         
+        # Shown while a puzzle is being generated
+        self.status_label = tk.Label(
+            self.board_frame,
+            text="",
+            font=("Arial", 12),
+            bg=self.bg_color,
+            fg="#2c3e50"
+        )
+        self.status_label.pack(pady=(10, 0))
+        self.progress = ttk.Progressbar(self.board_frame, mode="indeterminate",
+                                        length=canvas_size)
+        
         # Bind keyboard events
         self.root.bind("<Key>", self.on_key_press)
     
+    def draw_cell(self, row, col, text, color, font):
+        """Show text in a cell, touching the canvas only if it changed."""
+        value = (text, color, font)
+        if self.cell_values[(row, col)] == value:
+            return
+        _, cell_text = self.cells[(row, col)]
+        self.canvas.itemconfig(cell_text, text=text, fill=color, font=font)
+        self.cell_values[(row, col)] = value
+    
+    def render_board(self):
+        """Bring every cell in line with the game, redrawing changed ones."""
+        for row in range(9):
+            for col in range(9):
+                value = self.game.board[row][col]
+                is_original = self.game.is_cell_original(row, col)
+                self.draw_cell(
+                    row, col,
+                    str(value) if value != 0 else "",
+                    self.original_color if is_original else self.player_color,
+                    ("Arial", 20, "bold" if is_original else "normal")
+                )
+    
+    def clear_selection(self):
+        """Deselect the selected cell, if any."""
+        if self.selected_cell:
+            cell_bg, _ = self.cells[self.selected_cell]
+            self.canvas.itemconfig(cell_bg, fill="white")
+        self.selected_cell = None
+    
     def select_cell(self, row, col):
         """Select a cell on the board."""
         # Don't allow selection of original cells
-        if self.game.is_cell_original(row, col):
+        if self.game is None or self.game.is_cell_original(row, col):
             return
         
         # Deselect previous cell
@@ -284,10 +333,8 @@ class SudokuGUI:
         
         if success:
             # Update display
-            _, cell_text = self.cells[(row, col)]
-            display_text = str(num) if num != 0 else ""
-            self.canvas.itemconfig(cell_text, text=display_text, fill=self.player_color)
-            self.cell_values[(row, col)] = num
+            self.draw_cell(row, col, str(num) if num != 0 else "",
+                           self.player_color, ("Arial", 20, "normal"))
             
             # Check if game is complete
             if self.game.is_complete():
@@ -327,17 +374,19 @@ class SudokuGUI:
     
     def get_hint(self):
         """Get a hint for the puzzle."""
-        row, col, num = self.game.get_hint()
+        if self.game is None:
+            return
+        hint = self.game.find_hint()
         
-        if row is None:
+        if hint is None:
             messagebox.showinfo("No Hints", "No empty cells left!")
             return
+        row, col, num = hint.row, hint.col, hint.num
         
         # Place the hint
-        self.game.board[row][col] = num
-        _, cell_text = self.cells[(row, col)]
-        self.canvas.itemconfig(cell_text, text=str(num), fill=self.hint_color)
-        self.cell_values[(row, col)] = num
+        self.game.make_move(row, col, num)
+        self.draw_cell(row, col, str(num), self.hint_color,
+                       ("Arial", 20, "normal"))
         
         # Flash the cell
         cell_bg, _ = self.cells[(row, col)]
@@ -345,23 +394,20 @@ class SudokuGUI:
         self.canvas.itemconfig(cell_bg, fill="#d5f4e6")
         self.root.after(500, lambda: self.canvas.itemconfig(cell_bg, fill=original_color))
         
-        messagebox.showinfo("Hint", f"Placed {num} at position ({row}, {col})")
+        technique = hint.technique.replace("_", " ")
+        messagebox.showinfo("Hint", f"Placed {num} at position ({row}, {col}) by {technique}")
         
         if self.game.is_complete():
             self.show_victory()
     
     def check_solution(self):
         """Check the current solution."""
+        if self.game is None:
+            return
         if self.game.is_complete():
             self.show_victory()
         else:
-            # Check for errors
-            errors = 0
-            for row in range(9):
-                for col in range(9):
-                    if self.game.board[row][col] != 0:
-                        if self.game.board[row][col] != self.game.solution[row][col]:
-                            errors += 1
+            errors = self.game.error_count
             
             if errors > 0:
                 messagebox.showwarning(
@@ -369,7 +415,7 @@ class SudokuGUI:
                     f"You have {errors} error(s). Keep trying!"
                 )
             else:
-                empty = sum(1 for row in range(9) for col in range(9) if self.game.board[row][col] == 0)
+                empty = self.game.empty_count
                 messagebox.showinfo(
                     "Good Progress!",
                     f"No errors so far! {empty} cells remaining."
@@ -377,10 +423,12 @@ class SudokuGUI:
     
     def restart_game(self):
         """Restart the current puzzle."""
+        if self.game is None:
+            return
         if messagebox.askyesno("Restart Game", "Are you sure you want to restart?"):
-            self.game.board = [row[:] for row in self.game.original_board]
-            self.selected_cell = None
-            self.create_board()
+            self.game.restart()
+            self.clear_selection()
+            self.render_board()
     
     def show_victory(self):
         """Show victory message."""
@@ -439,28 +487,59 @@ class SudokuGUI:
             btn.pack(pady=5)
     
     def start_new_game(self, difficulty, dialog):
-        """Start a new game with selected difficulty."""
-        dialog.destroy()
+        """Start generating a new game with selected difficulty.
         
-        # Show loading message
-        loading = tk.Label(
-            self.board_frame,
-            text="Generating puzzle...",
-            font=("Arial", 16),
-            bg=self.bg_color,
-            fg="#2c3e50"
-        )
-        loading.pack()
-        self.root.update()
-        
-        # Create new game
-        self.game = Sudoku(difficulty)
-        self.game.create_puzzle()
-        self.selected_cell = None
+        The puzzle is made on a worker thread so the window stays
+        responsive; poll_generation picks it up. Asking for another game
+        meanwhile cancels the one in progress.
+        """
+        dialog.destroy()
         
-        # Remove loading message and create board
-        loading.destroy()
-        self.create_board()
+        # A poll loop is already running while a generation is under way
+        polling = self.generation is not None
+        if polling:
+            self.generation.cancel()
+        token = self.generation = CancelToken()
+        threading.Thread(target=self.generate, args=(difficulty, token),
+                         name="puzzle-generator", daemon=True).start()
+        
+        # Show progress until the puzzle arrives
+        self.status_label.config(text=f"Generating {difficulty} puzzle...")
+        self.progress.pack(pady=(5, 0))
+        self.progress.start(10)
+        if not polling:
+            self.root.after(POLL_MS, self.poll_generation)
+    
+    def generate(self, difficulty, token):
+        """Worker thread: make a game and queue it for the Tk thread."""
+        try:
+            self.results.put((token, create_game(difficulty, token), None))
+        except Exception as error:
+            # Always queue a result, or poll_generation would wait forever
+            self.results.put((token, None, error))
+    
+    def poll_generation(self):
+        """Take a finished puzzle off the queue, or check again later."""
+        while True:
+            try:
+                token, game, error = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if token is not self.generation:
+                continue  # superseded by a later request
+            self.generation = None
+            self.progress.stop()
+            self.progress.pack_forget()
+            self.status_label.config(text="")
+            if game is None:
+                messagebox.showerror("New Game", f"Could not generate a puzzle: {error}")
+                return
+            
+            self.game = game
+            self.clear_selection()
+            self.render_board()
+            return
+        self.root.after(POLL_MS, self.poll_generation)
 
 def main():
     """Main entry point for the GUI application."""
@@ -0,0 +1,87 @@
+"""
+Sudoku Metrics - search counters in the Prometheus text format
+The web servers record the SearchStats of every generated puzzle and every
+/api/solve or /api/validate puzzle here, and serve them on /metrics
+together with the session store and puzzle pool stats.
+"""
+
+import threading
+
+# Upper bounds of the nodes-per-search histogram buckets
+NODE_BUCKETS = (10, 100, 1000, 10000, 100000, 1000000)
+
+
+class SearchMetrics:
+    """Running totals of SearchStats per kind of search ("generate", "solve")."""
+
+    def __init__(self, buckets=NODE_BUCKETS):
+        self.buckets = buckets
+        self._kinds = {}
+        self._lock = threading.Lock()
+
+    def observe(self, kind, stats):
+        """Add one search's counters (a SearchStats.as_dict()) to kind."""
+        with self._lock:
+            totals = self._kinds.get(kind)
+            if totals is None:
+                totals = self._kinds[kind] = {
+                    'count': 0, 'nodes': 0, 'backtracks': 0,
+                    'propagations': 0, 'max_depth': 0,
+                    'buckets': [0] * len(self.buckets),
+                }
+            totals['count'] += 1
+            totals['nodes'] += stats['nodes']
+            totals['backtracks'] += stats['backtracks']
+            totals['propagations'] += stats['propagations']
+            totals['max_depth'] = max(totals['max_depth'], stats['max_depth'])
+            for i, bound in enumerate(self.buckets):
+                if stats['nodes'] <= bound:
+                    totals['buckets'][i] += 1
+
+    def render(self):
+        """Return the totals as Prometheus exposition lines."""
+        with self._lock:
+            kinds = {kind: dict(totals, buckets=list(totals['buckets']))
+                     for kind, totals in self._kinds.items()}
+        lines = []
+        for name, key, kind_of, help_text in (
+                ('sudoku_search_backtracks_total', 'backtracks', 'counter',
+                 'Branches undone by the search'),
+                ('sudoku_search_propagations_total', 'propagations', 'counter',
+                 'Digits placed by propagation rather than branching'),
+                ('sudoku_search_max_depth', 'max_depth', 'gauge',
+                 'Deepest branch seen by any search')):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind_of}')
+            for kind, totals in kinds.items():
+                lines.append(f'{name}{{kind="{kind}"}} {totals[key]}')
+
+        name = 'sudoku_search_nodes'
+        lines.append(f'# HELP {name} Search nodes visited per search')
+        lines.append(f'# TYPE {name} histogram')
+        for kind, totals in kinds.items():
+            for bound, count in zip(self.buckets, totals['buckets']):
+                lines.append(f'{name}_bucket{{kind="{kind}",le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{kind="{kind}",le="+Inf"}} {totals["count"]}')
+            lines.append(f'{name}_sum{{kind="{kind}"}} {totals["nodes"]}')
+            lines.append(f'{name}_count{{kind="{kind}"}} {totals["count"]}')
+        return lines
+
+
+def render_stats(prefix, stats, help_text):
+    """Render a flat stats() dict of numbers as gauges named prefix_<key>.
+
+    Nested dicts (such as a pool's stock per difficulty) become one labeled
+    series per entry.
+    """
+    lines = []
+    for key, value in stats.items():
+        name = f'{prefix}_{key}'
+        lines.append(f'# HELP {name} {help_text} ({key})')
+        lines.append(f'# TYPE {name} gauge')
+        if isinstance(value, dict):
+            for label, item in value.items():
+                lines.append(f'{name}{{key="{label}"}} {item}')
+        else:
+            lines.append(f'{name} {value}')
+    return lines
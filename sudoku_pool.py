@@ -0,0 +1,145 @@
+"""
+Sudoku Puzzle Pool - ready-made puzzles for the web game
+A background thread keeps a few generated puzzles per difficulty so that
+starting a new game is normally just taking one off the shelf.
+"""
+
+import threading
+from collections import deque
+
+from sudoku import Sudoku
+from sudoku_engine import BudgetExceeded, CancelToken
+
+
+def create_game(difficulty, token=None, size=9, time_limit=None):
+    """Generate a fresh game for difficulty; token can cancel it.
+
+    Raises BudgetExceeded if it takes more than time_limit seconds.
+    """
+    game = Sudoku(difficulty, size=size)
+    game.create_puzzle(token=token, time_limit=time_limit)
+    return game
+
+
+def create_game_bytes(difficulty, size=9, time_limit=None):
+    """Generate a fresh game for process pools.
+
+    Returns the serialized game and its generation stats as a dict, since
+    Sudoku.to_bytes does not carry the stats.
+    """
+    game = create_game(difficulty, size=size, time_limit=time_limit)
+    return game.to_bytes(), game.stats.as_dict()
+
+
+class PuzzlePool:
+    """Per-difficulty stock of generated games with watermark refilling.
+
+    When a difficulty drops below low_watermark the worker thread tops it
+    back up to high_watermark. get() falls back to generating inline when
+    the stock for that difficulty is empty.
+
+    factory(difficulty, token) makes one game; stop() cancels the token of
+    a generation that is under way so the thread exits promptly.
+    """
+
+    def __init__(self, difficulties=("easy", "medium", "hard"),
+                 low_watermark=2, high_watermark=8, factory=create_game):
+        if not 0 <= low_watermark <= high_watermark:
+            raise ValueError("Watermarks must satisfy 0 <= low <= high")
+        self.low_watermark = low_watermark
+        self.high_watermark = high_watermark
+        self.factory = factory
+        self.hits = 0
+        self.misses = 0
+        self._games = {difficulty: deque() for difficulty in difficulties}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self._token = None
+
+    def start(self):
+        """Start the refill thread if it is not already running."""
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._token = CancelToken()
+            self._thread = threading.Thread(target=self._refill,
+                                            name="puzzle-pool", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the refill thread and wait for it to finish."""
+        with self._cond:
+            thread = self._thread
+            self._stopping = True
+            self._thread = None
+            if self._token is not None:
+                self._token.cancel()
+            self._cond.notify_all()
+        if thread is not None:
+            thread.join()
+
+    def take(self, difficulty):
+        """Return a ready game for difficulty, or None (counted as a miss)."""
+        self.start()
+        with self._cond:
+            games = self._games[difficulty]
+            if games:
+                self.hits += 1
+                game = games.popleft()
+            else:
+                self.misses += 1
+                game = None
+            if len(games) < self.low_watermark:
+                self._cond.notify_all()
+        return game
+
+    def get(self, difficulty):
+        """Return a game for difficulty, generating inline if none is ready."""
+        game = self.take(difficulty)
+        if game is None:
+            game = self.factory(difficulty)
+        return game
+
+    def stats(self):
+        """Return the hit/miss counters and current stock per difficulty."""
+        with self._cond:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'available': {d: len(g) for d, g in self._games.items()},
+            }
+
+    def _next_to_fill(self):
+        """Pick the emptiest difficulty that is below its target, or None."""
+        low = min(self._games, key=lambda d: len(self._games[d]))
+        if len(self._games[low]) < self.high_watermark:
+            return low
+        return None
+
+    def _refill(self):
+        token = self._token
+        filling = False
+        while True:
+            with self._cond:
+                while not self._stopping:
+                    difficulty = self._next_to_fill()
+                    # Once woken, keep going until every stock is back at
+                    # the high watermark
+                    if difficulty is not None and (
+                            filling or any(len(g) < self.low_watermark
+                                           for g in self._games.values())):
+                        break
+                    filling = False
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                filling = True
+            try:
+                game = self.factory(difficulty, token)
+            except BudgetExceeded:
+                # Cancelled by stop(), or out of attempts; try again
+                continue
+            with self._cond:
+                self._games[difficulty].append(game)
@@ -0,0 +1,205 @@
+"""
+Sudoku Sessions - bounded store for live web games
+Games are evicted when the store is full (least recently used first) or
+when they have not been touched for longer than the idle TTL.
+
+Every store offers get(session_id), put(session_id, game),
+delete(session_id) and stats(). SessionStore keeps games in this process;
+SqliteSessionStore keeps them in a database file that several worker
+processes can share.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from sudoku import Sudoku
+
+
+class SessionStore:
+    """In-memory map of session id to game with LRU and idle-TTL eviction."""
+
+    def __init__(self, max_size=10000, ttl=3600, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evicted_lru = 0
+        self.evicted_ttl = 0
+        # Ordered oldest access first: session id -> (game, last access)
+        self._games = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        """Return the game for session_id, or None if unknown or expired."""
+        with self._lock:
+            now = self.clock()
+            self._expire(now)
+            entry = self._games.get(session_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._games[session_id] = (entry[0], now)
+            self._games.move_to_end(session_id)
+            return entry[0]
+
+    def put(self, session_id, game):
+        """Store game under session_id, evicting old games if needed."""
+        with self._lock:
+            now = self.clock()
+            self._expire(now)
+            self._games[session_id] = (game, now)
+            self._games.move_to_end(session_id)
+            while len(self._games) > self.max_size:
+                self._games.popitem(last=False)
+                self.evicted_lru += 1
+
+    def delete(self, session_id):
+        """Drop the game for session_id if there is one."""
+        with self._lock:
+            self._games.pop(session_id, None)
+
+    def __len__(self):
+        return len(self._games)
+
+    def stats(self):
+        """Return size and eviction counters."""
+        with self._lock:
+            return {
+                'size': len(self._games),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evicted_lru': self.evicted_lru,
+                'evicted_ttl': self.evicted_ttl,
+            }
+
+    def _expire(self, now):
+        """Evict games idle for longer than the TTL (oldest are first)."""
+        deadline = now - self.ttl
+        games = self._games
+        while games:
+            session_id, (_, last_access) = next(iter(games.items()))
+            if last_access > deadline:
+                break
+            del games[session_id]
+            self.evicted_ttl += 1
+
+
+class SqliteSessionStore:
+    """Games serialized with Sudoku.to_bytes in a shared sqlite file.
+
+    get and put are single primary-key statements. Eviction runs as one
+    sweep every sweep_interval puts, so its cost is spread over requests.
+    The counters are per process.
+    """
+
+    def __init__(self, path, max_size=10000, ttl=3600, sweep_interval=100,
+                 clock=time.time):
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evicted_lru = 0
+        self.evicted_ttl = 0
+        self._puts = 0
+        self._local = threading.local()
+        with self._connect() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS games ("
+                       "session_id TEXT PRIMARY KEY, "
+                       "data BLOB NOT NULL, "
+                       "last_access REAL NOT NULL)")
+            db.execute("CREATE INDEX IF NOT EXISTS games_last_access "
+                       "ON games (last_access)")
+
+    def _connect(self):
+        """Return this thread's connection, opening it on first use."""
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def get(self, session_id):
+        """Return the game for session_id, or None if unknown or expired."""
+        db = self._connect()
+        now = self.clock()
+        row = db.execute("SELECT data, last_access FROM games "
+                         "WHERE session_id = ?", (session_id,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        data, last_access = row
+        with db:
+            if last_access <= now - self.ttl:
+                db.execute("DELETE FROM games WHERE session_id = ?",
+                           (session_id,))
+                self.evicted_ttl += 1
+                self.misses += 1
+                return None
+            db.execute("UPDATE games SET last_access = ? WHERE session_id = ?",
+                       (now, session_id))
+        self.hits += 1
+        return Sudoku.from_bytes(data)
+
+    def put(self, session_id, game):
+        """Store game under session_id."""
+        db = self._connect()
+        with db:
+            db.execute("INSERT OR REPLACE INTO games "
+                       "(session_id, data, last_access) VALUES (?, ?, ?)",
+                       (session_id, game.to_bytes(), self.clock()))
+        self._puts += 1
+        if self._puts % self.sweep_interval == 0:
+            self.sweep()
+
+    def delete(self, session_id):
+        """Drop the game for session_id if there is one."""
+        db = self._connect()
+        with db:
+            db.execute("DELETE FROM games WHERE session_id = ?", (session_id,))
+
+    def sweep(self):
+        """Evict idle games, then the least recently used beyond max_size."""
+        db = self._connect()
+        with db:
+            expired = db.execute("DELETE FROM games WHERE last_access <= ?",
+                                 (self.clock() - self.ttl,)).rowcount
+            overflow = db.execute(
+                "DELETE FROM games WHERE session_id IN ("
+                "SELECT session_id FROM games ORDER BY last_access DESC "
+                "LIMIT -1 OFFSET ?)", (self.max_size,)).rowcount
+        self.evicted_ttl += expired
+        self.evicted_lru += overflow
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+    def stats(self):
+        """Return size and eviction counters."""
+        return {
+            'size': len(self),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evicted_lru': self.evicted_lru,
+            'evicted_ttl': self.evicted_ttl,
+        }
+
+
+def open_store(spec="memory", max_size=10000, ttl=3600):
+    """Create a store from a spec: "memory" or "sqlite:<path>"."""
+    if spec == "memory":
+        return SessionStore(max_size=max_size, ttl=ttl)
+    if spec.startswith("sqlite:"):
+        return SqliteSessionStore(spec[len("sqlite:"):], max_size=max_size,
+                                  ttl=ttl)
+    raise ValueError(f"Unknown session store: {spec}")
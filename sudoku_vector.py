@@ -0,0 +1,180 @@
+"""
+Sudoku Vector - NumPy checks over many boards at once
+Boards are stacked into an (N, size, size) integer array with 0 for empty
+cells. Digits become bitmasks as in sudoku_engine, and every check is a
+handful of array operations over the whole stack, so analytics and
+anti-cheat jobs can check millions of submitted boards without a Python
+loop per board. Needs numpy.
+"""
+
+import math
+from collections import namedtuple
+
+import numpy as np
+
+# Boards checked per round of array operations; small enough for the
+# temporary arrays to stay in cache, which is faster than one huge round
+CHUNK_SIZE = 4096
+
+# Result of check_boards(), one entry per board:
+#   valid     no digit out of range, no conflicts and no changed givens
+#   complete  no empty cells and no errors (no conflicts without solutions)
+#   conflicts filled cells whose digit occurs again in their row, column
+#             or box, as in Sudoku.conflicts
+#   empty     empty cells
+#   errors    filled cells that differ from the solution, as in
+#             Sudoku.error_count (None without solutions)
+#   changed   givens that were changed or cleared (None without givens)
+BatchCheck = namedtuple("BatchCheck", "valid complete conflicts empty errors changed")
+
+
+def _as_boards(boards, name="boards"):
+    """Return boards as an (N, size, size) array and its box size."""
+    boards = np.asarray(boards)
+    if boards.ndim == 2:
+        boards = boards[np.newaxis]
+    if boards.ndim != 3 or boards.shape[1] != boards.shape[2]:
+        raise ValueError(f"{name} must have shape (N, size, size)")
+    size = boards.shape[1]
+    box_size = math.isqrt(size)
+    if box_size * box_size != size:
+        raise ValueError(f"{name} size {size} is not a square number")
+    return boards, box_size
+
+
+def digit_bits(boards):
+    """Return each cell's digit n as the bit 1 << (n - 1), 0 if empty.
+
+    Digits outside 1..size are also 0, as in ConstraintState masks.
+    """
+    size = boards.shape[1]
+    dtype = np.uint16 if size <= 16 else np.uint32
+    # Looked up in a table: index 0 and size + 1 (anything out of range
+    # is clipped there) map to no bits
+    table = np.zeros(size + 2, dtype=dtype)
+    table[1:size + 1] = 1 << np.arange(size, dtype=dtype)
+    return table[np.clip(boards, 0, size + 1)]
+
+
+def _repeated(cells):
+    """Fold the cell arrays of a set of units into per-unit digit masks.
+
+    Returns (once, twice): the digits seen at least once and those seen
+    more than once.
+    """
+    once = np.zeros_like(cells[0])
+    twice = np.zeros_like(cells[0])
+    for bits in cells:
+        twice |= once & bits
+        once |= bits
+    return once, twice
+
+
+def _unit_cells(bits, box_size):
+    """Return the per-position cell arrays of the rows, columns and boxes.
+
+    Row, column and box arrays have shapes (N, size), (N, size) and
+    (N, box_size, box_size) - one entry per unit.
+    """
+    count, size = bits.shape[:2]
+    grid = bits.reshape(count, box_size, box_size, box_size, box_size)
+    return ([bits[:, :, k] for k in range(size)],
+            [bits[:, k, :] for k in range(size)],
+            [grid[:, :, i, :, j]
+             for i in range(box_size) for j in range(box_size)])
+
+
+def unit_masks(boards, box_size=3):
+    """Return (rows, cols, boxes) digit masks, each of shape (N, size).
+
+    Boxes are numbered left to right, top to bottom.
+    """
+    count = len(boards)
+    rows, cols, boxes = (_repeated(cells)[0] for cells in
+                         _unit_cells(digit_bits(boards), box_size))
+    return rows, cols, boxes.reshape(count, -1)
+
+
+def conflict_cells(boards, box_size=3):
+    """Return a boolean (N, size, size) array of the conflicting cells.
+
+    A cell conflicts when it holds a digit that occurs more than once in
+    its row, column or box.
+    """
+    count, size = boards.shape[:2]
+    bits = digit_bits(boards)
+    rows, cols, boxes = (_repeated(cells)[1] for cells in
+                         _unit_cells(bits, box_size))
+    # Spread each unit's repeated digits over its cells
+    repeated = (rows[:, :, np.newaxis] | cols[:, np.newaxis, :]).reshape(
+        count, box_size, box_size, box_size, box_size)
+    repeated |= boxes[:, :, np.newaxis, :, np.newaxis]
+    return (bits & repeated.reshape(count, size, size)) != 0
+
+
+def _check_chunk(boards, solutions, givens, box_size):
+    size = boards.shape[1]
+    filled = boards != 0
+    in_range = ((boards >= 0) & (boards <= size)).all(axis=(1, 2))
+    conflicts = conflict_cells(boards, box_size).sum(axis=(1, 2))
+    empty = (~filled).sum(axis=(1, 2))
+    valid = in_range & (conflicts == 0)
+    errors = changed = None
+    if solutions is not None:
+        errors = (filled & (boards != solutions)).sum(axis=(1, 2))
+        complete = (empty == 0) & (errors == 0)
+    else:
+        complete = (empty == 0) & valid
+    if givens is not None:
+        changed = ((givens != 0) & (boards != givens)).sum(axis=(1, 2))
+        valid &= changed == 0
+    return valid, complete, conflicts, empty, errors, changed
+
+
+def check_boards(boards, solutions=None, givens=None, chunk_size=CHUNK_SIZE):
+    """Check a stack of boards; returns a BatchCheck of (N,) arrays.
+
+    solutions and givens, when given, have the same shape as boards:
+    the solved grids (for error counts, like /check_solution) and the
+    original puzzles (cells other than 0 must be unchanged).
+    """
+    boards, box_size = _as_boards(boards)
+    if solutions is not None:
+        solutions = _as_boards(solutions, "solutions")[0]
+        if solutions.shape != boards.shape:
+            raise ValueError("solutions must have the same shape as boards")
+    if givens is not None:
+        givens = _as_boards(givens, "givens")[0]
+        if givens.shape != boards.shape:
+            raise ValueError("givens must have the same shape as boards")
+
+    parts = []
+    for start in range(0, len(boards), chunk_size) or [0]:
+        end = start + chunk_size
+        parts.append(_check_chunk(
+            boards[start:end],
+            None if solutions is None else solutions[start:end],
+            None if givens is None else givens[start:end],
+            box_size))
+    return BatchCheck(*(None if part[0] is None else np.concatenate(part)
+                        for part in zip(*parts)))
+
+
+def is_valid(boards, rows, cols, nums):
+    """Vectorized Sudoku.is_valid: can nums[n] go at (rows[n], cols[n])?
+
+    Like Sudoku.is_valid on a board other than the live one, the digit
+    must not occur anywhere in the row, column or box yet, including the
+    cell itself. Returns a boolean (N,) array.
+    """
+    boards, box_size = _as_boards(boards)
+    rows, cols, nums = (np.asarray(a, dtype=np.intp) for a in (rows, cols, nums))
+    size = boards.shape[1]
+    if ((nums < 1) | (nums > size)).any():
+        raise ValueError(f"nums must be between 1 and {size}")
+    bit = np.left_shift(np.uint32(1), (nums - 1).astype(np.uint32))
+    row_masks, col_masks, box_masks = unit_masks(boards, box_size)
+    index = np.arange(len(boards))
+    box = (rows // box_size) * box_size + cols // box_size
+    used = row_masks[index, rows] | col_masks[index, cols] | box_masks[index, box]
+    return (used & bit) == 0
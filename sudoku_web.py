@@ -4,15 +4,43 @@ Sudoku Game - Web Interface using Flask
 Run this to play Sudoku in your web browser!
 """
 
-from flask import Flask, render_template, jsonify, request, session
+from flask import (Flask, Response, render_template, jsonify, request,
+                   session, stream_with_context)
+from concurrent.futures import ProcessPoolExecutor
 from sudoku import Sudoku
+from sudoku_batch import ordered_map
+from sudoku_engine import BudgetExceeded
+from sudoku_pool import create_game_bytes
+import sudoku_api
+import os
 import secrets
 
 app = Flask(__name__)
-app.secret_key = secrets.token_hex(16)
+# Workers sharing a session store must also share the cookie signing key
+app.secret_key = os.environ.get('SUDOKU_SECRET_KEY') or secrets.token_hex(16)
 
-# Store games in session
-games = {}
+# Store games in session, dropping old or idle ones
+games = sudoku_api.open_games()
+
+# Puzzles generated ahead of time so new_game rarely has to wait
+puzzle_pool = sudoku_api.open_pool()
+
+# Solver processes for /api/solve, /api/validate and large new games,
+# created on first use; SUDOKU_SOLVERS sets their number
+solver_workers = int(os.environ.get('SUDOKU_SOLVERS', 0)) or os.cpu_count() or 1
+_solver_executor = None
+
+def solver_executor():
+    """Return the process pool used by the solve routes and large new games."""
+    global _solver_executor
+    if _solver_executor is None:
+        _solver_executor = ProcessPoolExecutor(max_workers=solver_workers)
+    return _solver_executor
+
+def respond(result):
+    """Turn a (status, body) pair from sudoku_api into a JSON response."""
+    status, body = result
+    return jsonify(body), status
 
 @app.route('/')
 def index():
@@ -21,124 +49,96 @@ def index():
 
 @app.route('/new_game/<difficulty>')
 def new_game(difficulty):
-    """Start a new game with specified difficulty."""
-    if difficulty not in ['easy', 'medium', 'hard']:
-        return jsonify({'error': 'Invalid difficulty'}), 400
-    
-    # Create new game
-    game = Sudoku(difficulty)
-    game.create_puzzle()
+    """Start a new game with specified difficulty (and ?size=, default 9)."""
+    size = request.args.get('size', 9, type=int)
+    error = sudoku_api.new_game_error(difficulty, size)
+    if error:
+        return respond(error)
+    
+    # Take a ready puzzle from the pool; it only holds 9x9 games. Other
+    # sizes are generated in a worker process, within a time limit.
+    stats = None
+    if size == 9:
+        game = puzzle_pool.get(difficulty)
+    else:
+        try:
+            data, stats = solver_executor().submit(
+                create_game_bytes, difficulty, size,
+                sudoku_api.GENERATE_TIME_LIMIT).result()
+        except BudgetExceeded as error:
+            return respond(sudoku_api.generation_error(error))
+        game = Sudoku.from_bytes(data)
     
     # Store in session
-    session_id = secrets.token_hex(8)
-    games[session_id] = game
+    session_id, result = sudoku_api.start_game(games, game, stats)
     session['game_id'] = session_id
-    
-    # Return game state
-    return jsonify({
-        'board': game.board,
-        'original': game.original_board,
-        'difficulty': difficulty,
-        'session_id': session_id
-    })
+    return respond(result)
 
 @app.route('/make_move', methods=['POST'])
 def make_move():
     """Make a move on the board."""
-    data = request.json
-    session_id = session.get('game_id')
-    
-    if not session_id or session_id not in games:
-        return jsonify({'error': 'No active game'}), 400
-    
-    game = games[session_id]
-    row = data.get('row')
-    col = data.get('col')
-    num = data.get('num')
-    
-    success, message = game.make_move(row, col, num)
-    
-    return jsonify({
-        'success': success,
-        'message': message,
-        'board': game.board,
-        'complete': game.is_complete()
-    })
+    return respond(sudoku_api.make_move(games, session.get('game_id'),
+                                        request.json or {}))
+
+@app.route('/make_moves', methods=['POST'])
+def make_moves():
+    """Apply a list of [row, col, num] moves in one request."""
+    return respond(sudoku_api.make_moves(games, session.get('game_id'),
+                                         request.json or {}))
 
 @app.route('/get_hint')
 def get_hint():
     """Get a hint for the current game."""
-    session_id = session.get('game_id')
-    
-    if not session_id or session_id not in games:
-        return jsonify({'error': 'No active game'}), 400
-    
-    game = games[session_id]
-    row, col, num = game.get_hint()
-    
-    if row is None:
-        return jsonify({'error': 'No hints available'})
-    
-    # Apply the hint
-    game.board[row][col] = num
-    
-    return jsonify({
-        'row': row,
-        'col': col,
-        'num': num,
-        'board': game.board,
-        'complete': game.is_complete()
-    })
+    return respond(sudoku_api.get_hint(games, session.get('game_id'),
+                                       request.args.get('seq', type=int)))
 
 @app.route('/check_solution')
 def check_solution():
     """Check if the current solution is correct."""
-    session_id = session.get('game_id')
-    
-    if not session_id or session_id not in games:
-        return jsonify({'error': 'No active game'}), 400
-    
-    game = games[session_id]
-    
-    if game.is_complete():
-        return jsonify({
-            'complete': True,
-            'errors': 0,
-            'message': 'Congratulations! You solved it!'
-        })
-    
-    # Count errors and empty cells
-    errors = 0
-    empty = 0
-    for row in range(9):
-        for col in range(9):
-            if game.board[row][col] == 0:
-                empty += 1
-            elif game.board[row][col] != game.solution[row][col]:
-                errors += 1
-    
-    return jsonify({
-        'complete': False,
-        'errors': errors,
-        'empty': empty,
-        'message': f'{errors} error(s), {empty} cell(s) remaining'
-    })
+    return respond(sudoku_api.check_solution(games, session.get('game_id')))
 
 @app.route('/restart')
 def restart():
     """Restart the current game."""
-    session_id = session.get('game_id')
-    
-    if not session_id or session_id not in games:
-        return jsonify({'error': 'No active game'}), 400
-    
-    game = games[session_id]
-    game.board = [row[:] for row in game.original_board]
-    
-    return jsonify({
-        'board': game.board,
-        'message': 'Game restarted'
-    })
+    return respond(sudoku_api.restart(games, session.get('game_id')))
+
+def solve_puzzles(validate):
+    """Stream NDJSON results for the puzzles in the request body.
+    
+    A JSON body holds "puzzle" or "puzzles"; any other body is read as one
+    puzzle per line, a line at a time.
+    """
+    if request.is_json:
+        puzzles = sudoku_api.read_puzzles(request.get_json(silent=True))
+    else:
+        puzzles = sudoku_api.read_puzzle_lines(request.stream)
+    strategy = request.args.get('strategy', 'mrv')
+    error = sudoku_api.solve_request_error(puzzles, strategy)
+    if error:
+        return respond(error)
+    
+    tasks = sudoku_api.solve_tasks(puzzles, validate, strategy)
+    results = ordered_map(solver_executor(), sudoku_api.solve_chunk, tasks,
+                          sudoku_api.SOLVE_TASKS_PER_WORKER * solver_workers)
+    kind = 'validate' if validate else 'solve'
+    return Response(stream_with_context(sudoku_api.ndjson_lines(results, kind)),
+                    mimetype='application/x-ndjson')
+
+@app.route('/api/solve', methods=['POST'])
+def api_solve():
+    """Solve one or many puzzles, streaming a result line per puzzle."""
+    return solve_puzzles(validate=False)
+
+@app.route('/api/validate', methods=['POST'])
+def api_validate():
+    """Check one or many puzzles for clashes and a unique solution."""
+    return solve_puzzles(validate=True)
+
+@app.route('/metrics')
+def metrics():
+    """Search, session and pool metrics in the Prometheus text format."""
+    return Response(sudoku_api.metrics_text(games, puzzle_pool),
+                    mimetype='text/plain; version=0.0.4')
 
 if __name__ == '__main__':
     print("\n" + "=" * 50)
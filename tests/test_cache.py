@@ -0,0 +1,110 @@
+"""Canonical forms and the solved-puzzle cache."""
+
+import os
+import random
+import tempfile
+import unittest
+
+from benchmarks.bench_suite import load_corpus
+from sudoku import Sudoku
+from sudoku_cache import SolutionCache, canonical_form, transforms
+
+
+def isomorph(board, rng, size=9, box_size=3):
+    """Return board under a random symmetry and relabeling of its digits."""
+    cells = [num for row in board for num in row]
+    source = rng.choice(transforms(size, box_size))
+    digits = list(range(1, size + 1))
+    rng.shuffle(digits)
+    moved = [digits[cells[i] - 1] if cells[i] else 0 for i in source]
+    return [moved[row * size:(row + 1) * size] for row in range(size)]
+
+
+def solve(board):
+    board = [row[:] for row in board]
+    Sudoku().solve(board, "dlx")
+    return board
+
+
+class CanonicalFormTest(unittest.TestCase):
+
+    def test_isomorphs_share_a_key(self):
+        rng = random.Random(1)
+        for board in load_corpus("seventeen"):
+            key = canonical_form([num for row in board for num in row])[0]
+            for _ in range(5):
+                other = isomorph(board, rng)
+                self.assertEqual(
+                    canonical_form([num for row in other for num in row])[0],
+                    key)
+
+    def test_different_puzzles_have_different_keys(self):
+        keys = {canonical_form([num for row in board for num in row])[0]
+                for board in load_corpus("easy")}
+        self.assertEqual(len(keys), len(load_corpus("easy")))
+
+
+class SolutionCacheTest(unittest.TestCase):
+
+    def test_isomorph_hit_is_mapped_back(self):
+        rng = random.Random(2)
+        cache = SolutionCache()
+        for board in load_corpus("seventeen"):
+            cache.put(board, solve(board))
+            other = isomorph(board, rng)
+            expected = [num for row in solve(other) for num in row]
+            self.assertEqual(cache.get(other), expected)
+        self.assertEqual(cache.stats()["hits"], len(load_corpus("seventeen")))
+
+    def test_miss(self):
+        boards = load_corpus("easy")
+        cache = SolutionCache()
+        cache.put(boards[0], solve(boards[0]))
+        self.assertIsNone(cache.get(boards[1]))
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_lru_limit(self):
+        boards = load_corpus("easy")[:3]
+        cache = SolutionCache(max_entries=2)
+        for board in boards:
+            cache.put(board, solve(board))
+        self.assertIsNone(cache.get(boards[0]))
+        self.assertIsNotNone(cache.get(boards[2]))
+
+    def test_sqlite_tier_outlives_the_cache(self):
+        board = load_corpus("seventeen")[0]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "solutions.db")
+            SolutionCache(path=path).put(board, solve(board))
+            cache = SolutionCache(path=path)
+            self.assertEqual(cache.get(board),
+                             [num for row in solve(board) for num in row])
+            self.assertEqual(cache.stats()["disk_hits"], 1)
+            cache._connect().close()
+
+    def test_wrong_size_is_rejected(self):
+        cache = SolutionCache()
+        board = [[0] * 16 for _ in range(16)]
+        with self.assertRaises(ValueError):
+            cache.get(board)
+        with self.assertRaises(ValueError):
+            cache.put(board, board)
+        with self.assertRaises(ValueError):
+            Sudoku(size=16).solve(board, "mrv", cache=cache)
+
+    def test_16x16_cache(self):
+        rng = random.Random(3)
+        game = Sudoku("easy", rng=rng, size=16)
+        game.create_puzzle()
+        board = game.board.to_list()
+        cache = SolutionCache(size=16, box_size=4)
+        cache.put(board, game.solution.to_list())
+        other = isomorph(board, rng, 16, 4)
+        solution = cache.get(other)
+        solved = [row[:] for row in other]
+        Sudoku(size=16).solve(solved, "dlx")
+        self.assertEqual(solution, [num for row in solved for num in row])
+
+
+if __name__ == "__main__":
+    unittest.main()
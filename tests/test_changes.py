@@ -0,0 +1,96 @@
+"""The move log behind changes_since and the API's delta responses."""
+
+import random
+import unittest
+
+import sudoku_api
+from sudoku import Sudoku
+
+
+def new_game(seed):
+    game = Sudoku("easy", rng=random.Random(seed))
+    game.create_puzzle()
+    return game
+
+
+def random_move(game, rng):
+    """Make one random move on a cell that is not a clue."""
+    while True:
+        row, col = rng.randrange(game.size), rng.randrange(game.size)
+        if not game.is_cell_original(row, col):
+            break
+    game.make_move(row, col, rng.randint(0, game.size))
+
+
+class ChangesSinceTest(unittest.TestCase):
+
+    def test_replaying_changes_rebuilds_the_board(self):
+        rng = random.Random(1)
+        game = new_game(1)
+        for _ in range(200):
+            client = game.board.to_list()
+            seq = game.seq
+            behind = rng.randint(0, 2 * game.CHANGE_LOG_SIZE)
+            for _ in range(behind):
+                random_move(game, rng)
+            changes = game.changes_since(seq)
+            if behind > game.CHANGE_LOG_SIZE:
+                self.assertIsNone(changes)
+                continue
+            for row, col, num in changes:
+                client[row][col] = num
+            self.assertEqual(client, game.board.to_list())
+
+    def test_restart_needs_the_whole_board(self):
+        rng = random.Random(2)
+        game = new_game(2)
+        random_move(game, rng)
+        seq = game.seq
+        game.restart()
+        self.assertIsNone(game.changes_since(seq))
+        self.assertEqual(game.changes_since(game.seq), [])
+
+    def test_unknown_seq_needs_the_whole_board(self):
+        game = new_game(3)
+        for seq in (None, -1, game.seq + 1, "abc", 1.5, "0", True, [0]):
+            self.assertIsNone(game.changes_since(seq), seq)
+
+
+class MoveApiTest(unittest.TestCase):
+
+    def setUp(self):
+        self.games = sudoku_api.open_games()
+        self.game = new_game(4)
+        self.session_id, _ = sudoku_api.start_game(self.games, self.game)
+        self.free = next((row, col) for row in range(9) for col in range(9)
+                         if not self.game.board[row][col])
+
+    def test_bad_seq_gets_the_whole_board(self):
+        row, col = self.free
+        for seq in ("abc", 1.5, None):
+            status, body = sudoku_api.make_move(
+                self.games, self.session_id,
+                {"row": row, "col": col, "num": 5, "seq": seq})
+            self.assertEqual(status, 200)
+            self.assertIn("board", body)
+            status, body = sudoku_api.get_hint(self.games, self.session_id, seq)
+            self.assertEqual(status, 200)
+            self.assertIn("board", body)
+
+    def test_current_seq_gets_only_the_change(self):
+        row, col = self.free
+        seq = self.game.seq
+        status, body = sudoku_api.make_moves(
+            self.games, self.session_id, {"moves": [[row, col, 5]], "seq": seq})
+        self.assertEqual(status, 200)
+        self.assertEqual(body["changes"], [[row, col, 5]])
+
+    def test_body_must_be_an_object(self):
+        for body in ([0, 0, 5], "move", None):
+            for handler in (sudoku_api.make_move, sudoku_api.make_moves):
+                status, _ = handler(self.games, self.session_id, body)
+                self.assertEqual(status, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""Running totals that Sudoku.make_move keeps up to date."""
+
+import random
+import unittest
+
+from sudoku import Sudoku
+
+
+def play(game, rng, moves):
+    """Make random moves on the game's empty cells; yield after each one."""
+    free = [(row, col) for row in range(game.size) for col in range(game.size)
+            if not game.is_cell_original(row, col)]
+    for _ in range(moves):
+        row, col = rng.choice(free)
+        # Mostly the right digit or a clear, so the board fills up and
+        # empties again, with wrong digits to make errors and clashes
+        num = rng.choice([0, game.solution[row][col], rng.randint(1, game.size)])
+        success, _ = game.make_move(row, col, num)
+        assert success
+        yield row, col, num
+
+
+class RunningTotalsTest(unittest.TestCase):
+
+    def assertTotalsMatchRecount(self, game):
+        totals = (game.empty_count, game.error_count, set(game.conflicts))
+        game._recount()
+        self.assertEqual(totals, (game.empty_count, game.error_count,
+                                  game.conflicts))
+
+    def test_totals_match_recount_after_every_move(self):
+        for seed, size in ((1, 9), (2, 9), (3, 16)):
+            rng = random.Random(seed)
+            game = Sudoku("easy", rng=rng, size=size)
+            game.create_puzzle()
+            self.assertTotalsMatchRecount(game)
+            for _ in play(game, rng, 300):
+                self.assertTotalsMatchRecount(game)
+
+    def test_restart_resets_totals(self):
+        rng = random.Random(4)
+        game = Sudoku("easy", rng=rng)
+        game.create_puzzle()
+        empty = game.empty_count
+        for _ in play(game, rng, 50):
+            pass
+        game.restart()
+        self.assertEqual((game.empty_count, game.error_count, game.conflicts),
+                         (empty, 0, set()))
+        self.assertTotalsMatchRecount(game)
+
+    def test_complete_only_when_solved(self):
+        rng = random.Random(5)
+        game = Sudoku("easy", rng=rng)
+        game.create_puzzle()
+        cells = [(row, col) for row in range(9) for col in range(9)
+                 if not game.board[row][col]]
+        # One wrong digit keeps the game open; correcting it finishes it
+        row, col = cells[0]
+        wrong = game.solution[row][col] % 9 + 1
+        game.make_move(row, col, wrong)
+        for r, c in cells[1:]:
+            game.make_move(r, c, game.solution[r][c])
+        self.assertFalse(game.is_complete())
+        self.assertEqual((game.empty_count, game.error_count), (0, 1))
+        game.make_move(row, col, game.solution[row][col])
+        self.assertTrue(game.is_complete())
+        self.assertEqual(game.conflicts, set())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+"""Soundness of the grader's techniques and the ratings they give."""
+
+import random
+import unittest
+
+import sudoku_grader
+from benchmarks.bench_suite import load_corpus
+from sudoku import Sudoku
+
+
+def solved(board, size=9):
+    solution = [row[:] for row in board]
+    Sudoku(size=size).solve(solution, "dlx")
+    return [num for row in solution for num in row]
+
+
+class SoundnessTest(unittest.TestCase):
+
+    def assertSound(self, board, size=9):
+        """Walk board with next_step, checking every finder on the way.
+
+        No placement may differ from the solution and no elimination may
+        remove the solution's digit.
+        """
+        solution = solved(board, size)
+        grid = sudoku_grader.CandidateGrid(board, size, int(size ** 0.5))
+        while grid.empty and not grid.broken:
+            for technique, finder in sudoku_grader.FINDERS.items():
+                step = finder(grid)
+                if step is None:
+                    continue
+                self.assertEqual(step.technique, technique)
+                # Every step makes progress, or searches that loop over
+                # the finders would never stop
+                self.assertTrue(step.placements or any(
+                    mask & grid.cand[i] for i, mask in step.eliminations))
+                for i, num in step.placements:
+                    self.assertEqual(num, solution[i], technique)
+                for i, mask in step.eliminations:
+                    self.assertFalse(mask & 1 << (solution[i] - 1), technique)
+            step = sudoku_grader.next_step(grid)
+            if step is None:
+                break
+            grid.apply(step)
+        self.assertFalse(grid.broken)
+        for i, num in enumerate(grid.cells):
+            if num:
+                self.assertEqual(num, solution[i])
+            else:
+                self.assertTrue(grid.cand[i] & 1 << (solution[i] - 1))
+
+    def test_corpus(self):
+        for tier in ("easy", "seventeen", "adversarial"):
+            for board in load_corpus(tier):
+                self.assertSound(board)
+
+    def test_generated(self):
+        rng = random.Random(1)
+        for difficulty, size in (("hard", 9), ("hard", 9), ("hard", 16)):
+            game = Sudoku(difficulty, rng=rng, size=size)
+            game.create_puzzle()
+            self.assertSound(game.board.to_list(), size)
+
+    def test_reduce_keeps_the_solution(self):
+        for board in load_corpus("seventeen"):
+            solution = solved(board)
+            grid = sudoku_grader.reduce(board)
+            for i, num in enumerate(grid.cells):
+                self.assertIn(num, (0, solution[i]))
+
+
+class RatingTest(unittest.TestCase):
+
+    def test_generated_puzzles_get_their_rating(self):
+        rng = random.Random(2)
+        for difficulty in ("easy", "medium", "hard"):
+            for _ in range(3):
+                game = Sudoku(difficulty, rng=rng)
+                game.create_puzzle()
+                grade = sudoku_grader.grade(game.board)
+                self.assertTrue(grade.solved)
+                self.assertEqual(grade.rating, difficulty)
+
+    def test_solved_board_needs_no_technique(self):
+        board = [solved(load_corpus("easy")[0])[row * 9:(row + 1) * 9]
+                 for row in range(9)]
+        grade = sudoku_grader.grade(board)
+        self.assertEqual((grade.rating, grade.level, grade.solved),
+                         ("easy", 0, True))
+
+    def test_max_level_stops_grading(self):
+        game = Sudoku("hard", rng=random.Random(5))
+        game.create_puzzle()
+        grade = sudoku_grader.grade(game.board, max_level=2)
+        self.assertEqual(grade.rating, "expert")
+        self.assertFalse(grade.solved)
+        self.assertTrue(grade.unsolved)
+
+
+class HintTest(unittest.TestCase):
+
+    def test_hints_follow_the_solution(self):
+        game = Sudoku("hard", rng=random.Random(3))
+        game.create_puzzle()
+        while not game.is_complete():
+            hint = game.find_hint()
+            self.assertEqual(hint.num, game.solution[hint.row][hint.col])
+            self.assertFalse(game.board[hint.row][hint.col])
+            game.make_move(hint.row, hint.col, hint.num)
+
+    def test_wrong_digit_is_corrected_first(self):
+        game = Sudoku("easy", rng=random.Random(4))
+        game.create_puzzle()
+        row, col = next((r, c) for r in range(9) for c in range(9)
+                        if not game.board[r][c])
+        game.make_move(row, col, game.solution[row][col] % 9 + 1)
+        hint = game.find_hint()
+        self.assertEqual((hint.row, hint.col, hint.technique),
+                         (row, col, "wrong_digit"))
+        self.assertEqual(hint.num, game.solution[row][col])
+
+
+if __name__ == "__main__":
+    unittest.main()
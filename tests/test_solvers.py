@@ -0,0 +1,184 @@
+"""Solution counts and search counters of the mrv and dlx solvers."""
+
+import random
+import unittest
+
+from benchmarks.bench_suite import load_corpus
+from sudoku import Sudoku
+from sudoku_engine import BudgetExceeded, ConstraintState, SearchBudget
+
+
+def brute_count(board, size, box_size, limit):
+    """Count solutions up to limit with plain candidate sets."""
+    board = [row[:] for row in board]
+    state = ConstraintState.from_board(board, size, box_size)
+
+    def search():
+        best = None
+        for row in range(size):
+            for col in range(size):
+                if board[row][col]:
+                    continue
+                nums = [num for num in range(1, size + 1)
+                        if state.can_place(row, col, num)]
+                if best is None or len(nums) < len(best[2]):
+                    best = (row, col, nums)
+        if best is None:
+            return 1
+        row, col, nums = best
+        found = 0
+        for num in nums:
+            board[row][col] = num
+            state.place(row, col, num)
+            found += search()
+            state.remove(row, col, num)
+            board[row][col] = 0
+            if found >= limit:
+                break
+        return found
+
+    return min(search(), limit)
+
+
+def variants(board, solution, rng, size, clearings):
+    """Yield board with extra clues cleared, and with a wrong digit added."""
+    clues = [(row, col) for row in range(size) for col in range(size)
+             if board[row][col]]
+    for cleared in clearings:
+        other = [row[:] for row in board]
+        for row, col in rng.sample(clues, cleared):
+            other[row][col] = 0
+        yield other
+    # A digit that clashes with nothing but differs from the solution
+    state = ConstraintState.from_board(board, size, int(size ** 0.5))
+    empty = [(row, col) for row in range(size) for col in range(size)
+             if not board[row][col]]
+    rng.shuffle(empty)
+    for row, col in empty:
+        for num in range(1, size + 1):
+            if num != solution[row][col] and state.can_place(row, col, num):
+                other = [r[:] for r in board]
+                other[row][col] = num
+                yield other
+                return
+
+
+class CountSolutionsTest(unittest.TestCase):
+
+    def check_counts(self, boards, size, clearings=(0, 2, 5, 10), limit=3):
+        rng = random.Random(size)
+        game = Sudoku(size=size)
+        box_size = game.box_size
+        for board in boards:
+            solution = [row[:] for row in board]
+            self.assertTrue(game.solve(solution, "dlx"))
+            for other in variants(board, solution, rng, size, clearings):
+                expected = brute_count(other, size, box_size, limit)
+                for strategy in ("mrv", "dlx"):
+                    self.assertEqual(
+                        game.count_solutions(other, limit, strategy=strategy),
+                        expected, strategy)
+
+    def test_9x9_counts_match_brute_force(self):
+        self.check_counts(load_corpus("easy")[:5], 9)
+        # The brute force takes seconds on a bare 17-clue grid, so some of
+        # the solution is given back first
+        rng = random.Random(0)
+        boards = []
+        for board in load_corpus("seventeen"):
+            solution = [row[:] for row in board]
+            Sudoku().solve(solution, "dlx")
+            board = [row[:] for row in board]
+            for cell in rng.sample(range(81), 20):
+                row, col = divmod(cell, 9)
+                board[row][col] = solution[row][col]
+            boards.append(board)
+        self.check_counts(boards, 9)
+
+    def test_16x16_counts_match_brute_force(self):
+        boards = []
+        for seed in (1, 2):
+            game = Sudoku("easy", rng=random.Random(seed), size=16)
+            game.create_puzzle()
+            boards.append(game.board.to_list())
+        self.check_counts(boards, 16)
+
+    def test_16x16_hard_counts(self):
+        # Hard grids make mrv use the grader eliminations. Generation
+        # proved the puzzle unique, and a wrong digit leaves no solution.
+        rng = random.Random(3)
+        game = Sudoku("hard", rng=rng, size=16)
+        game.create_puzzle()
+        board = game.board.to_list()
+        wrong, = variants(board, game.solution.to_list(), rng, 16, ())
+        for strategy in ("mrv", "dlx"):
+            self.assertEqual(game.count_solutions(board, 3, strategy=strategy), 1)
+            self.assertEqual(game.count_solutions(wrong, 3, strategy=strategy), 0)
+
+    def test_solutions_keep_the_clues(self):
+        for size, tier in ((9, "adversarial"), (16, None)):
+            if tier:
+                boards = load_corpus(tier)
+            else:
+                game = Sudoku("hard", rng=random.Random(3), size=16)
+                game.create_puzzle()
+                boards = [game.board.to_list()]
+            for board in boards:
+                for strategy in ("mrv", "dlx"):
+                    solved = [row[:] for row in board]
+                    self.assertTrue(Sudoku(size=size).solve(solved, strategy))
+                    state = ConstraintState.from_board(solved, size,
+                                                       int(size ** 0.5))
+                    self.assertTrue(all(count == 1 for count in state.counts
+                                        if count))
+                    self.assertTrue(all(all(row) for row in solved))
+                    self.assertTrue(all(
+                        solved[r][c] == board[r][c]
+                        for r in range(size) for c in range(size)
+                        if board[r][c]))
+
+
+def open_board():
+    """Return an easy puzzle with many solutions, so every solver branches."""
+    board = [row[:] for row in load_corpus("easy")[0]]
+    for row in range(4):
+        board[row] = [0] * 9
+    return board
+
+
+class SearchCountersTest(unittest.TestCase):
+
+    def test_trace_sees_every_node(self):
+        board = open_board()
+        for strategy in ("backtrack", "mrv", "dlx"):
+            game = Sudoku()
+            moves = []
+            solved = [row[:] for row in board]
+            game.solve(solved, strategy,
+                       trace=lambda depth, move: moves.append(move))
+            self.assertEqual(len(moves), game.stats.nodes, strategy)
+            self.assertIsNone(moves[0])
+            self.assertGreater(game.stats.max_depth, 0)
+            self.assertLessEqual(game.stats.backtracks, game.stats.nodes)
+
+    def test_propagations_fill_the_rest(self):
+        board = load_corpus("seventeen")[1]
+        empty = sum(1 for row in board for num in row if not num)
+        for strategy in ("mrv", "dlx"):
+            game = Sudoku()
+            solved = [row[:] for row in board]
+            game.solve(solved, strategy)
+            self.assertLessEqual(game.stats.propagations, empty)
+            self.assertGreater(game.stats.propagations, 0)
+
+    def test_node_budget(self):
+        board = open_board()
+        game = Sudoku()
+        with self.assertRaises(BudgetExceeded) as raised:
+            game.solve([row[:] for row in board], "mrv",
+                       budget=SearchBudget(max_nodes=1, check_every=1))
+        self.assertEqual(raised.exception.reason, "nodes")
+
+
+if __name__ == "__main__":
+    unittest.main()